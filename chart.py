@@ -0,0 +1,133 @@
+"""This contains plotting helpers for charts of nuclides, matplotlib is only imported when drawing"""
+
+import numpy as np
+
+from nuctable import to_table
+
+magic_num = [2, 8, 20, 28, 50, 82, 126]
+
+def box_vertices(N,Z):
+	"""
+	Get the corners of the unit boxes centred on every nuclide, as an (n, 4, 2) array
+
+	Parameters:
+	   N ( array ): Neutron numbers
+	   Z ( array ): Proton numbers
+	"""
+	corners = np.array([[-0.5,-0.5],[0.5,-0.5],[0.5,0.5],[-0.5,0.5]])
+	centres = np.stack([np.asarray(N,dtype=float),np.asarray(Z,dtype=float)],axis=-1)
+	return centres[:,None,:] + corners
+
+def draw_layer(N,Z,fcolor='None',ecolor='gray',falpha = 1,linewidth=None,ax=None):
+	"""
+	Draw the boxes of a whole layer of nuclides as a single collection
+
+	Much faster to draw and to pan/zoom than one Rectangle patch per nuclide.
+	Returns the collection.
+
+	Parameters:
+	   N ( array ): Neutron numbers
+	   Z ( array ): Proton numbers
+	   fcolor ( str ): Face color code
+	   ecolor ( str ): Edge color code
+	   falpha ( float ): Opacity
+	   linewidth ( float ): Edge line width, the default patch line width when None
+	   ax ( Axes ): Axes to draw on, the current axes when None
+	"""
+	import matplotlib.pyplot as plt
+	from matplotlib.collections import PolyCollection
+	if ax is None:
+		ax = plt.gca()
+	layer = PolyCollection(box_vertices(N,Z),facecolors=fcolor,edgecolors=ecolor,alpha=falpha,linewidths=linewidth)
+	ax.add_collection(layer,autolim=False)
+	return layer
+
+class LabelLayer:
+	"""
+	Nuclide labels drawn as one path collection, shown only in zoomed views
+
+	The label glyphs are built once. Whenever the axes limits change, the
+	labels inside the view are selected and the layer is hidden while the
+	visible N or Z span is at least max_span, where labels would overlap.
+
+	Parameters:
+	   N ( array ): Neutron numbers
+	   Z ( array ): Proton numbers
+	   labels ( array ): Label of every nuclide
+	   max_span ( float ): Largest visible N or Z span showing labels
+	   fontsize ( str ): Font size
+	   ax ( Axes ): Axes to draw on, the current axes when None
+	"""
+	def __init__(self, N, Z, labels, max_span=40, fontsize='xx-small', ax=None):
+		import matplotlib.pyplot as plt
+		from matplotlib.collections import PathCollection
+		from matplotlib.font_manager import FontProperties
+		from matplotlib.textpath import TextPath
+		from matplotlib.transforms import Affine2D
+		self.ax = plt.gca() if ax is None else ax
+		self.max_span = max_span
+		# Text anchored like plt.text at (N-0.2, Z-0.2)
+		self.offsets = np.stack([np.asarray(N,dtype=float)-0.2,np.asarray(Z,dtype=float)-0.2],axis=-1)
+		prop = FontProperties(size=fontsize)
+		self.paths = [TextPath((0,0),label,prop=prop) for label in labels]
+		# Glyphs are in points, scaled to pixels at the dpi of every draw so labels keep their size when zooming or saving
+		self.collection = PathCollection([],offsets=np.empty((0,2)),offset_transform=self.ax.transData,
+			transform=Affine2D().scale(1/72.)+self.ax.figure.dpi_scale_trans,facecolors='k',edgecolors='None')
+		self.ax.add_collection(self.collection,autolim=False)
+		self.ax.callbacks.connect('xlim_changed',lambda ax: self.update())
+		self.ax.callbacks.connect('ylim_changed',lambda ax: self.update())
+		self.update()
+
+	def update(self):
+		"""
+		Select the labels inside the current view, or hide them all when zoomed out
+		"""
+		(x0,x1) = sorted(self.ax.get_xlim())
+		(y0,y1) = sorted(self.ax.get_ylim())
+		visible = (x1-x0)<self.max_span and (y1-y0)<self.max_span
+		self.collection.set_visible(visible)
+		if visible:
+			inside = np.flatnonzero((self.offsets[:,0]>=x0-1) & (self.offsets[:,0]<=x1) & (self.offsets[:,1]>=y0-1) & (self.offsets[:,1]<=y1))
+			self.collection.set_paths([self.paths[i] for i in inside])
+			self.collection.set_offsets(self.offsets[inside])
+
+def plot_driplines(data_bound,data_bound_Qbn,xlim=[0,250],ylim=[0,136]):
+	"""
+	Draw the bound nuclides of a mass model, and those with Qbn>0 in red
+
+	Parameters:
+	   data_bound ( list ): Structured array or array of dictionaries of bound nuclides
+	   data_bound_Qbn ( list ): Structured array or array of dictionaries of bound nuclides with Qbn>0
+	   xlim ( list ): Neutron number range
+	   ylim ( list ): Proton number range
+	"""
+	data_bound = to_table(data_bound)
+	data_bound_Qbn = to_table(data_bound_Qbn)
+	draw_layer(data_bound["N"],data_bound["Z"],fcolor='gray',ecolor='None',falpha = 0.5)
+	draw_layer(data_bound_Qbn["N"],data_bound_Qbn["Z"],fcolor='red',ecolor='None',falpha = 0.5)
+	set_chart_axes(xlim=xlim,ylim=ylim)
+
+def plot_magic_lines():
+	"""
+	Draw dashed guide lines around the magic proton and neutron numbers
+	"""
+	import matplotlib.pyplot as plt
+	for i in magic_num:
+		plt.axhline(y=i+0.5,color='b',linestyle='--',linewidth=0.2)
+		plt.axhline(y=i-0.5,color='b',linestyle='--',linewidth=0.2)
+		plt.axvline(x=i+0.5,color='b',linestyle='--',linewidth=0.2)
+		plt.axvline(x=i-0.5,color='b',linestyle='--',linewidth=0.2)
+
+def set_chart_axes(xlim=[9.5,200], ylim=[9.5,116]):
+	"""
+	Label the N and Z axes and set the visible region of the chart
+
+	Parameters:
+	   xlim ( list ): Neutron number range
+	   ylim ( list ): Proton number range
+	"""
+	import matplotlib.pyplot as plt
+	plt.xlabel('Neutron number, $N$')
+	plt.ylabel('Proton number, $Z$')
+	plt.xlim(xlim)
+	plt.ylim(ylim)
@@ -0,0 +1,135 @@
+"""This contains a headless batch exporter rendering many chart variants in a process pool"""
+
+import concurrent.futures
+import json
+import os
+
+import numpy as np
+
+from chart import draw_layer, plot_magic_lines, set_chart_axes
+from nuctable import MappedTable, open_mapped
+
+complement_layers = [
+	{"table": "data_bound.npy", "fcolor": "gray", "ecolor": "None", "falpha": 0.5},
+	{"table": "nubase_stable_add_to_iaea_crp.npy", "fcolor": "k", "ecolor": "None"},
+	{"table": "datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep.npy", "fcolor": "g", "ecolor": "k", "label": "FRDM+QRPA"},
+	{"table": "nubase_bminus_add_to_iaeacrp_bdn.npy", "fcolor": "r", "ecolor": "k", "label": "NUBASE"},
+	{"table": "iaea_crp_bdn.npy", "fcolor": "y", "ecolor": "k", "label": "IAEA CRP"},
+]
+
+combined_layers = [
+	{"table": "nubase_stable_add_to_iaeacrp_bdn_220327.npy", "fcolor": "k", "ecolor": "None"},
+	{"table": "iaea_crp_nubase_combined_220327.npy", "where": {"source": "nubase"}, "fcolor": "r", "ecolor": "k", "label": "NUBASE"},
+	{"table": "iaea_crp_nubase_combined_220327.npy", "exclude": {"source": "nubase"}, "fcolor": "y", "ecolor": "k", "label": "IAEA CRP"},
+]
+
+# Neutron and proton number windows of the zoomed charts around the N=50, 82 and 126 shell closures
+zoom_windows = {50: [20,45], 82: [38,60], 126: [60,85]}
+
+default_specs = [
+	{"name": "driplines_frdm_ws36", "xlim": [0,250], "ylim": [0,136], "title": "FRDM2012 vs WS3.6", "layers": [
+		{"table": "data_bound.npy", "fcolor": "gray", "ecolor": "None", "falpha": 0.5, "label": "bound FRDM2012"},
+		{"table": "data_bound_WS36.npy", "fcolor": "b", "ecolor": "None", "falpha": 0.3, "label": "bound WS3.6"},
+		{"table": "data_bound_Qbn.npy", "fcolor": "red", "ecolor": "None", "falpha": 0.5, "label": "Qbn>0 FRDM2012"},
+		{"table": "data_bound_Qbn_WS36.npy", "fcolor": "m", "ecolor": "None", "falpha": 0.3, "label": "Qbn>0 WS3.6"}]},
+	{"name": "crp_211114_220327", "title": "IAEA CRP lists 211114 vs 220327", "layers": [
+		{"table": "iaea_crp_bdn_220327.npy", "fcolor": "c", "ecolor": "k", "label": "220327"},
+		{"table": "iaea_crp_bdn.npy", "fcolor": "y", "ecolor": "k", "falpha": 0.7, "label": "211114"}]},
+	{"name": "complement", "layers": complement_layers},
+	{"name": "combined_220327", "layers": combined_layers},
+] + [
+	{"name": "complement_N%d" % n, "title": "N=%d" % n, "xlim": [n-15,n+15], "ylim": zoom_windows[n], "layers": complement_layers}
+	for n in sorted(zoom_windows)
+]
+
+# Tables opened by a worker process, keyed by table file name
+worker_tables = {}
+
+def init_worker(columns):
+	"""
+	Select the Agg backend and open the shared memory-mapped tables in a worker process
+
+	Parameters:
+	   columns ( dict ): Column directory keyed by table file name
+	"""
+	import matplotlib
+	matplotlib.use("Agg")
+	for (table, indir) in columns.items():
+		worker_tables[table] = MappedTable(indir)
+
+def layer_mask(table, layer):
+	"""
+	Get the rows of a table drawn by a layer, from its "where" and "exclude" column values
+
+	Parameters:
+	   table ( MappedTable ): Nuclide table
+	   layer ( dict ): Layer spec
+	"""
+	mask = np.ones(len(table), dtype=bool)
+	for (key, value) in layer.get("where", {}).items():
+		mask &= table[key]==value
+	for (key, value) in layer.get("exclude", {}).items():
+		mask &= table[key]!=value
+	return mask
+
+def render(spec, outdir, formats):
+	"""
+	Render one chart spec to every format, returning the written file names
+
+	Parameters:
+	   spec ( dict ): Chart spec with "name", "layers" and optional "xlim", "ylim" and "title"
+	   outdir ( str ): Output directory
+	   formats ( list ): File formats, e.g. png, pdf and svg
+	"""
+	import matplotlib.pyplot as plt
+	fig = plt.figure(figsize=spec.get("figsize", (6.4,4.8)))
+	ax = fig.gca()
+	plot_magic_lines()
+	for layer in spec["layers"]:
+		table = worker_tables[layer["table"]]
+		mask = layer_mask(table, layer)
+		collection = draw_layer(table["N"][mask],table["Z"][mask],fcolor=layer.get("fcolor",'None'),ecolor=layer.get("ecolor",'gray'),falpha=layer.get("falpha",1),linewidth=layer.get("linewidth"),ax=ax)
+		if "label" in layer:
+			collection.set_label(layer["label"])
+	set_chart_axes(xlim=spec.get("xlim",[9.5,200]), ylim=spec.get("ylim",[9.5,116]))
+	if "title" in spec:
+		ax.set_title(spec["title"])
+	if any("label" in layer for layer in spec["layers"]):
+		ax.legend(loc="upper left", fontsize="small")
+	outfiles = []
+	for fmt in formats:
+		outfile = os.path.join(outdir, spec["name"] + "." + fmt)
+		fig.savefig(outfile, dpi=spec.get("dpi", 200))
+		outfiles.append(outfile)
+	plt.close(fig)
+	return outfiles
+
+def load_specs(infile):
+	"""
+	Load a list of chart specs from a JSON file
+
+	Parameters:
+	   infile ( str ): File path-name
+	"""
+	with open(infile) as file1:
+		return json.load(file1)
+
+def export_charts(specs=default_specs, outdir=".", formats=("png",), jobs=None):
+	"""
+	Render chart specs with the Agg backend across a process pool, returning the written file names
+
+	Every table is converted once to a memory-mapped column store before the
+	pool starts, so workers share its pages instead of loading a copy per figure.
+
+	Parameters:
+	   specs ( list ): Chart specs, see render
+	   outdir ( str ): Output directory
+	   formats ( list ): File formats, e.g. png, pdf and svg
+	   jobs ( int ): Number of worker processes
+	"""
+	os.makedirs(outdir, exist_ok=True)
+	tables = sorted({layer["table"] for spec in specs for layer in spec["layers"]})
+	columns = {table: open_mapped(table).indir for table in tables}
+	with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(columns,)) as pool:
+		futures = [pool.submit(render, spec, outdir, list(formats)) for spec in specs]
+		return [outfile for future in futures for outfile in future.result()]
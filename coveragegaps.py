@@ -0,0 +1,141 @@
+"""This contains a coverage-gap report of the evaluated and predicted beta-delayed neutron emitters"""
+
+import csv
+import json
+
+import numpy as np
+
+from chart import magic_num
+from nuclideindex import GridIndex
+from nuclides import nuclide_labels
+from nuclideset import NuclideSet
+from nucmerge import merge_sources
+from nuctable import from_columns, load_table
+
+# Coverage categories, from the best to no data
+categories = ["iaeacrp", "nubase", "frdmqrpa", "none"]
+
+# Width of the mass number bins of the "region" breakdown
+region_width = 20
+
+# IAEA CRP list tables and mass model dripline tables known by name
+crp_lists = {"211114": "iaea_crp_bdn.npy", "220327": "iaea_crp_bdn_220327.npy"}
+qbn_tables = {"FRDM2012": "data_bound_Qbn.npy", "WS3.6": "data_bound_Qbn_WS36.npy"}
+
+def shell_labels(Z, N):
+	"""
+	Get the shell closure of every nuclide: "Z=<magic>", "N=<magic>", both, or "open"
+
+	Parameters:
+	   Z ( array ): Proton numbers
+	   N ( array ): Neutron numbers
+	"""
+	Z = np.asarray(Z)
+	N = np.asarray(N)
+	labels = np.full(len(Z), "open", dtype="U16")
+	magic_Z = np.isin(Z, magic_num)
+	magic_N = np.isin(N, magic_num)
+	labels[magic_Z] = np.char.add("Z=", Z[magic_Z].astype(str))
+	labels[magic_N] = np.char.add("N=", N[magic_N].astype(str))
+	both = magic_Z & magic_N
+	labels[both] = np.char.add(np.char.add(np.char.add("Z=", Z[both].astype(str)), ",N="), N[both].astype(str))
+	return labels
+
+def region_labels(A):
+	"""
+	Get the mass region "A <low>-<high>" of every nuclide
+
+	Parameters:
+	   A ( array ): Mass numbers
+	"""
+	low = (np.asarray(A)//region_width)*region_width
+	return np.char.add(np.char.add(np.char.add("A ", np.char.zfill(low.astype(str), 3)), "-"), np.char.zfill((low+region_width-1).astype(str), 3))
+
+def coverage_table(bound_Qbn, iaea_crp, nubase_bminus, datafrdmqrpa):
+	"""
+	Classify every bound Qbn>0 nuclide by its best data source
+
+	Returns a structured array with "A", "Z", "N", the exclusive "source"
+	(IAEA CRP over NUBASE over FRDM+QRPA, "none" without data), the
+	"has_<source>" flags, and the "region" and "shell" groups.
+
+	Parameters:
+	   bound_Qbn ( list ): Bound nuclides with Qbn>0
+	   iaea_crp ( list ): IAEA CRP evaluations
+	   nubase_bminus ( list ): NUBASE B- emitters
+	   datafrdmqrpa ( list ): FRDM+QRPA predictions
+	"""
+	tables = {"iaeacrp": iaea_crp, "nubase": nubase_bminus, "frdmqrpa": datafrdmqrpa}
+	(merged, kept) = merge_sources([{"name": name, "table": table} for (name, table) in tables.items()], fields=["A","Z","N"])
+	(Z, N) = (np.asarray(bound_Qbn["Z"]), np.asarray(bound_Qbn["N"]))
+	rows = GridIndex(merged).rows(Z, N)
+	columns = {"A": Z+N, "Z": Z, "N": N, "source": np.where(rows>=0, merged["source"][np.maximum(rows, 0)], "none")}
+	for (name, table) in tables.items():
+		columns["has_" + name] = NuclideSet.from_table(table).contains(Z, N)
+	columns["region"] = region_labels(Z+N)
+	columns["shell"] = shell_labels(Z, N)
+	return from_columns(columns)
+
+def breakdown(table, key):
+	"""
+	Count the nuclides of every coverage category in every group of a column
+
+	Returns a list of dictionaries with "group", "total" and one count per category.
+
+	Parameters:
+	   table ( list ): Table returned by coverage_table
+	   key ( str ): Column to group by
+	"""
+	(groups, inverse) = np.unique(table[key], return_inverse=True)
+	counts = {category: np.bincount(inverse[table["source"]==category], minlength=len(groups)) for category in categories}
+	total = np.bincount(inverse, minlength=len(groups))
+	return [dict([("group", group.item()), ("total", int(total[g]))] + [(category, int(counts[category][g])) for category in categories])
+		for (g, group) in enumerate(groups)]
+
+def coverage_report(table):
+	"""
+	Get the summary, the breakdowns by Z, N, mass region and shell closure, and the nuclide lists of every category
+
+	Parameters:
+	   table ( list ): Table returned by coverage_table
+	"""
+	labels = nuclide_labels(table["A"], table["Z"])
+	return {
+		"summary": dict([("total", len(table))] + [(category, int(np.count_nonzero(table["source"]==category))) for category in categories]
+			+ [("has_" + name, int(np.count_nonzero(table["has_" + name]))) for name in categories[:-1]]),
+		"breakdowns": {key: breakdown(table, key) for key in ("Z", "N", "region", "shell")},
+		"nuclides": {category: labels[table["source"]==category].tolist() for category in categories},
+	}
+
+def write_report(report, outstem):
+	"""
+	Write a coverage report to <outstem>.json and its breakdowns to <outstem>.csv
+
+	Parameters:
+	   report ( dict ): Report returned by coverage_report
+	   outstem ( str ): Output file path-name without extension
+	"""
+	with open(outstem + ".json", 'w') as file1:
+		json.dump(report, file1, indent=1)
+	with open(outstem + ".csv", 'w', newline='') as file1:
+		writer = csv.writer(file1)
+		writer.writerow(["breakdown", "group", "total"] + categories)
+		writer.writerow(["all", "all", report["summary"]["total"]] + [report["summary"][category] for category in categories])
+		for (key, rows) in report["breakdowns"].items():
+			for row in rows:
+				writer.writerow([key, row["group"], row["total"]] + [row[category] for category in categories])
+
+def run(model="FRDM2012", crp_list="220327", outstem=None):
+	"""
+	Run the coverage stage: report the coverage of the Qbn>0 nuclides of a mass model by an IAEA CRP list, NUBASE and FRDM+QRPA
+
+	Parameters:
+	   model ( str ): Mass model name, a key of qbn_tables
+	   crp_list ( str ): IAEA CRP list name, a key of crp_lists
+	   outstem ( str ): Output file path-name without extension, coverage_<model>_<list> when None
+	"""
+	table = coverage_table(load_table(qbn_tables[model]), load_table(crp_lists[crp_list]), load_table("nubase_bminus.npy"), load_table("datafrdmqrpa_pxn_t12.npy"))
+	report = coverage_report(table)
+	report["inputs"] = {"model": model, "crp_list": crp_list}
+	write_report(report, outstem or "coverage_%s_%s" % (model, crp_list))
+	return report
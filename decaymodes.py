@@ -0,0 +1,89 @@
+"""This contains a tokenizer for the NUBASE decay-mode (BR) field"""
+
+import re
+import numpy as np
+
+# One decay branch, e.g. "B-n=86.3 9", "B-2n<1.5", "B-n ?", "A~100#", "B-=100 +0-3"
+branch_pattern = re.compile(r"\s*(?P<mode>[^=<>~?\s\[]+)\s*(?P<relation>[=<>~]?)\s*(?P<value>\?|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)?(?P<syst>#?)\s*(?P<unc>\d+\.?\d*(?:[eE][-+]?\d+)?|\+\d+\.?\d*-\d+\.?\d*)?")
+
+branch_dtype = [("row","i4"),("mode","U12"),("relation","U1"),("value","f8"),("unc","f8"),("syst","?")]
+
+def parse_branch(text):
+	"""
+	Parse one decay branch into (mode, relation, value, uncertainty, systematics flag)
+
+	The relation is one of "=", "<", ">", "~", or "?" when the value is unknown.
+	The uncertainty is kept as written in the table (in units of the last
+	digit). Missing values and uncertainties give NaN and 0, and asymmetric
+	uncertainties "+a-b" give the larger of a and b.
+
+	Parameters:
+	   text ( str ): Decay branch, e.g. "B-n=86.3 9"
+	"""
+	match = branch_pattern.match(text)
+	if (match is None):
+		return None
+	(mode,relation,value,syst,unc) = match.group("mode","relation","value","syst","unc")
+	if (value is None or value=="?"):
+		return (mode, "?", np.nan, 0., syst=="#")
+	if (relation==""):
+		relation = "="
+	if (unc is None):
+		unc = 0.
+	elif (unc[0]=="+"):
+		unc = max(float(x) for x in unc[1:].split("-"))
+	else:
+		unc = float(unc)
+	return (mode, relation, float(value), unc, syst=="#")
+
+def parse_branches(BR):
+	"""
+	Parse the BR field of every nuclide into one flat array of branch records
+
+	Every decay-mode string is split on ";" and tokenized once. The "row" field
+	gives the index of the nuclide in BR.
+
+	Parameters:
+	   BR ( array ): BR field of every nuclide
+	"""
+	records = []
+	for (row,text) in enumerate(BR):
+		for part in text.split(";"):
+			branch = parse_branch(part)
+			if (branch is not None):
+				records.append((row,)+branch)
+	return np.array(records, dtype=branch_dtype)
+
+def first_mode(branches, n_rows):
+	"""
+	Get the first (dominant) decay mode of every nuclide, "" when there is none
+
+	Parameters:
+	   branches ( array ): Branch records from parse_branches
+	   n_rows ( int ): Number of nuclides
+	"""
+	mode = np.full(n_rows, "", dtype=branches.dtype["mode"])
+	rows,first = np.unique(branches["row"], return_index=True)
+	mode[rows] = branches["mode"][first]
+	return mode
+
+def branch_ratio(branches, n_rows, mode, limit=-9999.):
+	"""
+	Get the branching ratio and uncertainty of one decay mode for every nuclide
+
+	Nuclides without this mode get 0. Branches with an unknown value or only
+	an upper/lower limit get the limit value.
+
+	Parameters:
+	   branches ( array ): Branch records from parse_branches
+	   n_rows ( int ): Number of nuclides
+	   mode ( str ): Decay mode, e.g. "B-n", "B-2n", "B-3n" or "A"
+	   limit ( float ): Value for unknown and limit-only branches
+	"""
+	value = np.zeros(n_rows)
+	unc = np.zeros(n_rows)
+	sel = branches[branches["mode"]==mode][::-1]
+	known = np.isin(sel["relation"],["=","~"])
+	value[sel["row"]] = np.where(known, sel["value"], limit)
+	unc[sel["row"]] = np.where(known, sel["unc"], 0.)
+	return value,unc
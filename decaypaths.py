@@ -0,0 +1,214 @@
+"""This contains a memoized tracer of the beta-delayed neutron decay paths from every precursor to its end products"""
+
+import numpy as np
+
+from nuclideindex import GridIndex
+from nuclideset import NuclideSet
+from nucmerge import merge_sources
+from nuctable import from_columns, load_table, save_table
+from summation import branching_ratios
+
+class DecayPaths:
+	"""
+	Beta-decay graph of the B- emitters of a table with the end-product distribution of every nuclide
+
+	Every emitter decays to (Z+1, N-1-j) with the branching ratio Pjn
+	(j>=1, see summation.branching_ratios) and to (Z+1, N-1) with the rest.
+	Nuclides of the terminal set, and daughters that are not emitters, end
+	the paths. Decays always raise Z by one, so the end products of a Z
+	layer follow from those of the Z+1 layer: they are computed for all
+	nuclides in one pass from the highest Z down, cached per layer, and
+	set_branching only recomputes the ancestors of a changed emitter.
+
+	Parameters:
+	   data ( list ): B- emitters, a structured array with "Z", "N" and "P1n", "P2n", ... columns
+	   stable ( list ): Terminal nuclides, e.g. nubase_stable
+	   percent ( bool ): Branching ratios are in % rather than fractions
+	"""
+	def __init__(self, data, stable, percent=True):
+		self.percent = percent
+		(self.branch_fields, self.multiplicity, branches) = branching_ratios(data, percent)
+		terminal = NuclideSet.from_table(stable)
+		emitter = ~terminal.contains(data["Z"], data["N"])
+		(Z, N) = (np.asarray(data["Z"], dtype=int)[emitter], np.asarray(data["N"], dtype=int)[emitter])
+		emitted = np.concatenate([[0], self.multiplicity]).astype(int)
+		(daughter_Z, daughter_N) = (np.broadcast_to(Z[:, None]+1, (len(Z), len(emitted))), N[:, None]-1-emitted)
+		keep = daughter_N>=0
+		nodes = from_columns({"Z": np.concatenate([Z, daughter_Z[keep]]), "N": np.concatenate([N, daughter_N[keep]])})
+		# Sorted by Z then N, so that the nuclides of a Z layer are contiguous
+		self.nodes = nodes[np.unique(nodes["Z"].astype(np.int64)*1000+nodes["N"], return_index=True)[1]]
+		self.index = GridIndex(self.nodes)
+		self.size = len(self.nodes)
+		self.stable = terminal.contains(self.nodes["Z"], self.nodes["N"])
+		# Node row of every emitter, and of its daughters, column 0 without neutron emission
+		self.emitters = self.index.rows(Z, N)
+		self.daughters = np.where(keep, self.index.rows(daughter_Z, np.maximum(daughter_N, 0)), -1)
+		self.probability = np.concatenate([1-branches[emitter].sum(axis=1, keepdims=True), branches[emitter]], axis=1)
+		self.decays = np.zeros(self.size, dtype=bool)
+		self.decays[self.emitters] = True
+		layer_Z = self.nodes["Z"]
+		starts = np.flatnonzero(np.concatenate([[True], layer_Z[1:]!=layer_Z[:-1]]))
+		self.layers = list(zip(starts, np.concatenate([starts[1:], [self.size]])))
+		self.layer_of = np.repeat(np.arange(len(self.layers)), np.diff(np.concatenate([starts, [self.size]])))
+		self.build_branching()
+		self.blocks = [None]*len(self.layers)
+		self._matrix = None
+		for k in range(len(self.layers)-1, -1, -1):
+			self.blocks[k] = self.layer_block(k)
+
+	def build_branching(self):
+		"""
+		Build the sparse (parent, daughter) branching ratio matrix from the emitter branching ratios
+		"""
+		import scipy.sparse
+		valid = (self.daughters>=0) & (self.probability>0)
+		parents = np.broadcast_to(self.emitters[:, None], self.daughters.shape)
+		self.branching = scipy.sparse.csr_matrix((self.probability[valid], (parents[valid], self.daughters[valid])), shape=(self.size, self.size))
+
+	def next_layer(self, k):
+		"""
+		Get the index of the layer fed by the layer k (Z+1), None without one
+
+		Parameters:
+		   k ( int ): Layer index
+		"""
+		if k+1<len(self.layers) and self.nodes["Z"][self.layers[k+1][0]]==self.nodes["Z"][self.layers[k][0]]+1:
+			return k+1
+		return None
+
+	def layer_block(self, k, rows=None):
+		"""
+		Compute the end-product distributions of the nuclides of a layer (or of some of its rows) as a sparse (row, node) matrix
+
+		Parameters:
+		   k ( int ): Layer index
+		   rows ( array ): Node rows of the layer to compute, all when None
+		"""
+		import scipy.sparse
+		(s, e) = self.layers[k]
+		rows = np.arange(s, e) if rows is None else np.asarray(rows)
+		ends = np.flatnonzero(~self.decays[rows])
+		block = scipy.sparse.csr_matrix((np.ones(len(ends)), (ends, rows[ends])), shape=(len(rows), self.size))
+		following = self.next_layer(k)
+		if following is not None:
+			(ns, ne) = self.layers[following]
+			block = (block + self.branching[rows][:, ns:ne] @ self.blocks[following]).tocsr()
+		return block
+
+	def matrix(self):
+		"""
+		Get the end-product distributions of all the nuclides as a sparse (node, node) matrix, rows summing to 1
+		"""
+		import scipy.sparse
+		if self._matrix is None:
+			self._matrix = scipy.sparse.vstack(self.blocks).tocsr()
+		return self._matrix
+
+	def end_products(self, Z, N):
+		"""
+		Get the end products of a nuclide as a structured array of "Z", "N", "A", "probability" and "stable", most probable first
+
+		Parameters:
+		   Z ( int ): Proton number
+		   N ( int ): Neutron number
+		"""
+		row = self.index.rows([Z], [N])[0]
+		if row<0:
+			raise KeyError("No nuclide Z=%d N=%d in the decay paths" % (Z, N))
+		(s, e) = self.layers[self.layer_of[row]]
+		distribution = self.blocks[self.layer_of[row]][row-s]
+		order = np.argsort(-distribution.data, kind="stable")
+		ends = distribution.indices[order]
+		(Z, N) = (self.nodes["Z"][ends], self.nodes["N"][ends])
+		return from_columns({"Z": Z, "N": N, "A": Z+N, "probability": distribution.data[order], "stable": self.stable[ends]})
+
+	def set_branching(self, Z, N, values):
+		"""
+		Change the branching ratios of an emitter and update the end products of it and of its ancestors only
+
+		Returns the number of nuclides whose end products were recomputed.
+
+		Parameters:
+		   Z ( int ): Proton number
+		   N ( int ): Neutron number
+		   values ( dict ): New branching ratios keyed by field (e.g. {"P1n": 12.5}), in the units of the table
+		"""
+		import scipy.sparse
+		row = self.index.rows([Z], [N])[0]
+		emitter = np.flatnonzero(self.emitters==row)
+		if row<0 or len(emitter)==0:
+			raise KeyError("No emitter Z=%d N=%d in the decay paths" % (Z, N))
+		branches = self.probability[emitter[0], 1:].copy()
+		for (key, value) in values.items():
+			branches[self.branch_fields.index(key)] = max(value, 0)/(100. if self.percent else 1.)
+		if branches.sum()>1:
+			branches /= branches.sum()
+		self.probability[emitter[0]] = np.concatenate([[1-branches.sum()], branches])
+		self.build_branching()
+		self._matrix = None
+		(k, affected, updated) = (self.layer_of[row], np.array([row]), 0)
+		while len(affected):
+			(s, e) = self.layers[k]
+			fresh = self.layer_block(k, affected)
+			keep = np.ones(e-s, dtype=bool)
+			keep[affected-s] = False
+			self.blocks[k] = (scipy.sparse.diags(keep.astype(float)) @ self.blocks[k]
+				+ scipy.sparse.csr_matrix((np.ones(len(affected)), (affected-s, np.arange(len(affected)))), shape=(e-s, len(affected))) @ fresh).tocsr()
+			updated += len(affected)
+			# The parents of the affected nuclides are in the previous layer
+			if k==0 or self.next_layer(k-1)!=k:
+				break
+			(ps, pe) = self.layers[k-1]
+			affected = ps + np.flatnonzero(self.branching[ps:pe][:, affected].getnnz(axis=1))
+			k -= 1
+		return updated
+
+	def summary(self):
+		"""
+		Summarize the end products of every emitter
+
+		Returns a structured array with "Z", "N", "A", the mean number of
+		neutrons emitted along the paths ("neutrons"), the probability of
+		ending in the terminal set ("stable_fraction") and the most probable
+		end product ("end_Z", "end_N", "end_probability").
+		"""
+		matrix = self.matrix()[self.emitters].tocoo()
+		(Z, N) = (self.nodes["Z"][self.emitters], self.nodes["N"][self.emitters])
+		A_end = (self.nodes["Z"]+self.nodes["N"])[matrix.col]
+		neutrons = (Z+N) - np.bincount(matrix.row, weights=matrix.data*A_end, minlength=len(Z))
+		stable_fraction = np.bincount(matrix.row, weights=matrix.data*self.stable[matrix.col], minlength=len(Z))
+		# Most probable end product: the last entry of every row sorted by probability
+		order = np.lexsort((matrix.data, matrix.row))
+		last = order[np.concatenate([matrix.row[order][1:]!=matrix.row[order][:-1], [True]])]
+		end = self.nodes[matrix.col[last]]
+		return from_columns({"Z": Z, "N": N, "A": Z+N, "neutrons": neutrons, "stable_fraction": stable_fraction,
+			"end_Z": end["Z"], "end_N": end["N"], "end_probability": matrix.data[last]})
+
+def load_emitters():
+	"""
+	Get the NUBASE B- emitters (FRDM+QRPA Pxn when NUBASE has none) and the other FRDM+QRPA nuclides, with branching ratios in %
+	"""
+	nubase_bminus = load_table("nubase_bminus_addFRDMQRPAPxn.npy")
+	datafrdmqrpa = load_table("datafrdmqrpa_pxn_t12.npy")
+	(fields, multiplicity, branches) = branching_ratios(datafrdmqrpa, percent=False)
+	frdmqrpa = from_columns(dict([("Z", datafrdmqrpa["Z"]), ("N", datafrdmqrpa["N"])] + [(key, 100*branches[:, k]) for (k, key) in enumerate(fields)]))
+	(data, kept) = merge_sources([{"name": "nubase", "table": nubase_bminus}, {"name": "frdmqrpa", "table": frdmqrpa}],
+		fields=["Z", "N"] + fields, defaults={key: 0 for key in fields})
+	return data
+
+def load_paths():
+	"""
+	Build the decay paths of the emitters of load_emitters, ending at the NUBASE stable nuclides
+	"""
+	return DecayPaths(load_emitters(), load_table("nubase_stable.npy"))
+
+def run(outfile="decay_paths.npy"):
+	"""
+	Save the end-product summary of every emitter, see DecayPaths.summary
+
+	Parameters:
+	   outfile ( str ): Output table
+	"""
+	paths = load_paths()
+	save_table(outfile, paths.summary())
+	return paths
@@ -0,0 +1,153 @@
+"""This contains a vectorized engine for separation energies and Q-values over a (Z, N) grid"""
+
+import numpy as np
+
+# Neutron mass excess (MeV)
+mass_excess_n = 8.07131806
+
+def nuclide_grid(Z, N, values, margin=2):
+	"""
+	Scatter values into a dense (Z, N) array with NaN for missing nuclides
+
+	The grid is padded by margin cells on every side so that neighbours up to
+	margin steps away can be read by shifting, without bounds checks. Returns
+	the grid and the (Z, N) index of every input row in it.
+
+	Parameters:
+	   Z ( array ): Proton numbers
+	   N ( array ): Neutron numbers
+	   values ( array ): Values of every nuclide
+	   margin ( int ): Number of padding cells
+	"""
+	Z = np.asarray(Z, dtype=int)
+	N = np.asarray(N, dtype=int)
+	zi = Z - Z.min() + margin
+	ni = N - N.min() + margin
+	grid = np.full((zi.max()+margin+1, ni.max()+margin+1), np.nan)
+	# np.unique gives the first entry of duplicated nuclides
+	(cells, first) = np.unique(np.ravel_multi_index((zi, ni), grid.shape), return_index=True)
+	grid.flat[cells] = np.asarray(values, dtype=float)[first]
+	return grid, zi, ni
+
+def separation_energies(Z, N, Ebind, Mth):
+	"""
+	Compute S1n, S2n, S1p, S2p, Qb and Qbn of every nuclide by shifted-array differences
+
+	Missing neighbours give -9999. Also returns the "bound" mask (S1n, S2n,
+	S1p and S2p all positive) and the "bound_Qbn" mask (bound with Qb>0 and Qbn>0).
+
+	Parameters:
+	   Z ( array ): Proton numbers
+	   N ( array ): Neutron numbers
+	   Ebind ( array ): Binding energies (MeV)
+	   Mth ( array ): Mass excesses (MeV)
+	"""
+	Ebind = np.asarray(Ebind, dtype=float)
+	Mth = np.asarray(Mth, dtype=float)
+	Ebind_grid, zi, ni = nuclide_grid(Z, N, Ebind)
+	Mth_grid = nuclide_grid(Z, N, Mth)[0]
+	result = {
+		"S1n": Ebind - Ebind_grid[zi, ni-1],
+		"S2n": Ebind - Ebind_grid[zi, ni-2],
+		"S1p": Ebind - Ebind_grid[zi-1, ni],
+		"S2p": Ebind - Ebind_grid[zi-2, ni],
+		"Qb": Mth - Mth_grid[zi+1, ni-1],
+		"Qbn": Mth - Mth_grid[zi+1, ni-2] - mass_excess_n,
+	}
+	for key in result:
+		result[key][np.isnan(result[key])] = -9999
+	result["bound"] = (result["S1n"]>0) & (result["S2n"]>0) & (result["S1p"]>0) & (result["S2p"]>0)
+	result["bound_Qbn"] = result["bound"] & (result["Qbn"]>0) & (result["Qb"]>0)
+	return result
+
+def neighbour(grid, dz, dn):
+	"""
+	Get the value of nuclide (Z+dz, N+dn) at every (Z, N) of the last two axes of a grid, NaN outside it
+
+	Parameters:
+	   grid ( array ): Values over (..., Z, N)
+	   dz ( int ): Proton number shift
+	   dn ( int ): Neutron number shift
+	"""
+	out = np.full(grid.shape, np.nan)
+	(nz, nn) = grid.shape[-2:]
+	if (abs(dz)<nz and abs(dn)<nn):
+		out[..., max(-dz,0):nz-max(dz,0), max(-dn,0):nn-max(dn,0)] = grid[..., max(dz,0):nz+min(dz,0), max(dn,0):nn+min(dn,0)]
+	return out
+
+def compare_models(tables):
+	"""
+	Compute separation energies and Q-values of several mass models at once on a shared (Z, N) grid
+
+	Returns one structured array over every nuclide of any model, sorted by
+	(Z, N). The "S1n", "S2n", "S1p", "S2p", "Qb", "Qbn", "bound" and
+	"bound_Qbn" columns hold one value per model, in the order of tables,
+	with -9999 (and not bound) where a model lacks the nuclide or a
+	neighbour. "n_bound" and "n_bound_Qbn" count the models predicting the
+	nuclide bound (with Qbn>0), "bound_agree" and "bound_Qbn_agree" are true
+	when all models agree, and the "<quantity>_spread" columns give the
+	maximum minus minimum over the models with a value (-9999 if none).
+
+	Parameters:
+	   tables ( list ): Structured arrays with "Z", "N", "Ebind" and "Mth" columns, one per model
+	"""
+	Z = [np.asarray(table["Z"], dtype=int) for table in tables]
+	N = [np.asarray(table["N"], dtype=int) for table in tables]
+	(z0, n0) = (min(z.min() for z in Z), min(n.min() for n in N))
+	shape = (len(tables), max(z.max() for z in Z)-z0+1, max(n.max() for n in N)-n0+1)
+	Ebind = np.full(shape, np.nan)
+	Mth = np.full(shape, np.nan)
+	for (m, table) in enumerate(tables):
+		# np.unique gives the first entry of duplicated nuclides
+		(cells, first) = np.unique(np.ravel_multi_index((Z[m]-z0, N[m]-n0), shape[1:]), return_index=True)
+		Ebind[m].flat[cells] = np.asarray(table["Ebind"], dtype=float)[first]
+		Mth[m].flat[cells] = np.asarray(table["Mth"], dtype=float)[first]
+	values = {
+		"S1n": Ebind - neighbour(Ebind, 0, -1),
+		"S2n": Ebind - neighbour(Ebind, 0, -2),
+		"S1p": Ebind - neighbour(Ebind, -1, 0),
+		"S2p": Ebind - neighbour(Ebind, -2, 0),
+		"Qb": Mth - neighbour(Mth, 1, -1),
+		"Qbn": Mth - neighbour(Mth, 1, -2) - mass_excess_n,
+	}
+	bound = (values["S1n"]>0) & (values["S2n"]>0) & (values["S1p"]>0) & (values["S2p"]>0)
+	bound_Qbn = bound & (values["Qbn"]>0) & (values["Qb"]>0)
+	(zi, ni) = np.nonzero(~np.isnan(Ebind).all(axis=0))
+	n_models = len(tables)
+	dtype = [("Z","i4"),("N","i4"),("A","i4")] + [(key,"f8",(n_models,)) for key in values] + [("bound","?",(n_models,)),("bound_Qbn","?",(n_models,)),
+		("n_bound","i4"),("n_bound_Qbn","i4"),("bound_agree","?"),("bound_Qbn_agree","?")] + [(key+"_spread","f8") for key in values]
+	result = np.zeros(len(zi), dtype=dtype)
+	result["Z"] = zi + z0
+	result["N"] = ni + n0
+	result["A"] = result["Z"] + result["N"]
+	for (key, value) in values.items():
+		value = value[:, zi, ni].T
+		present = ~np.isnan(value)
+		result[key] = np.where(present, value, -9999)
+		spread = np.nanmax(np.where(present, value, -np.inf), axis=1) - np.nanmin(np.where(present, value, np.inf), axis=1)
+		result[key+"_spread"] = np.where(present.any(axis=1), spread, -9999)
+	result["bound"] = bound[:, zi, ni].T
+	result["bound_Qbn"] = bound_Qbn[:, zi, ni].T
+	result["n_bound"] = result["bound"].sum(axis=1)
+	result["n_bound_Qbn"] = result["bound_Qbn"].sum(axis=1)
+	result["bound_agree"] = (result["n_bound"]==0) | (result["n_bound"]==n_models)
+	result["bound_Qbn_agree"] = (result["n_bound_Qbn"]==0) | (result["n_bound_Qbn"]==n_models)
+	return result
+
+def getdriplines(data):
+	"""
+	Get bound nuclides and bound nuclides with Qbn>0 from a mass table
+
+	Parameters:
+	   data ( list ): Structured array or array of dictionaries with "ZA", "N", "Z", "A", "EL", "Ebind" and "Mth" keys
+	"""
+	column = lambda key: data[key] if isinstance(data, np.ndarray) else [item[key] for item in data]
+	sep = separation_energies(column("Z"), column("N"), column("Ebind"), column("Mth"))
+	(S1n,S2n,S1p,S2p,Qb,Qbn) = map(lambda key: sep[key].tolist(),("S1n","S2n","S1p","S2p","Qb","Qbn"))
+	data_bound = []
+	data_bound_Qbn = []
+	for i in np.flatnonzero(sep["bound"]):
+		data_bound.append({"ZA": data[i]["ZA"],"N": data[i]["N"],"Z": data[i]["Z"],"A": data[i]["A"],"EL": data[i]["EL"],"Ebind":data[i]["Ebind"],"S1n":S1n[i],"S2n":S2n[i],"S1p":S1p[i],"S2p":S2p[i]})
+		if (sep["bound_Qbn"][i]):
+			data_bound_Qbn.append({"ZA": data[i]["ZA"],"N": data[i]["N"],"Z": data[i]["Z"],"A": data[i]["A"],"EL": data[i]["EL"],"Ebind":data[i]["Ebind"],"S1n":S1n[i],"S2n":S2n[i],"S1p":S1p[i],"S2p":S2p[i],"Qb":Qb[i],"Qbn":Qbn[i]})
+	return data_bound,data_bound_Qbn
@@ -0,0 +1,40 @@
+"""This contains a vectorized reader for fixed-width text tables"""
+
+import numpy as np
+
+def read_lines(infile, comment="#"):
+	"""
+	Read all lines of a text file as one bytes array, skipping comment lines
+
+	Parameters:
+	   infile ( str ): File path-name
+	   comment ( str ): Comment character at the beginning of a line
+	"""
+	with open(infile, 'rb') as file1:
+		lines = np.array(file1.read().splitlines())
+	if (len(lines)==0):
+		return lines
+	lines = lines[np.char.str_len(lines)>0]
+	return lines[lines.view(np.uint8).reshape(len(lines), -1)[:, 0] != ord(comment)]
+
+def read_fixed_width(infile, fields, comment="#"):
+	"""
+	Read fixed-width columns of a text file in one pass
+
+	Lines are padded with spaces and sliced as one (line, character) array.
+	Returns a dictionary of stripped string arrays, one per field.
+
+	Parameters:
+	   infile ( str ): File path-name
+	   fields ( list ): (name, start, stop) character range of every column
+	   comment ( str ): Comment character at the beginning of a line
+	"""
+	lines = read_lines(infile, comment)
+	width = max([stop for (name, start, stop) in fields] + [lines.dtype.itemsize])
+	chars = lines.astype("S%d" % width).view(np.uint8).reshape(len(lines), width).copy()
+	chars[chars==0] = ord(" ")
+	columns = {}
+	for (name, start, stop) in fields:
+		column = np.ascontiguousarray(chars[:, start:stop]).view("S%d" % (stop-start)).ravel()
+		columns[name] = np.char.decode(np.char.strip(column), 'utf-8')
+	return columns
@@ -1,367 +1,214 @@
 """This contains functions to manipulate reaclib v2 data file"""
 
-import struct
 import numpy as np
-import re
 
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-from matplotlib.colors import BoundaryNorm
-from matplotlib.ticker import MaxNLocator
+from chart import draw_layer, plot_magic_lines, set_chart_axes
+from decaymodes import branch_ratio, first_mode, parse_branches
+from fixedwidth import read_fixed_width
+from iaeacrp import read_iaea_crp_table, save_crp_states
+from nuclideindex import GridIndex, state_keys
+from nuclides import getnamebyz, time_factor
+from nuctable import from_columns, load_table, open_mapped, save_table
+from parsecache import cached_parse
 
-time_factor = {'s':1., 'y':31536000., 'ms': 0.001, 'd' : 86400., 'ky' : 31536000000, 'm' : 60., 'h': 3600.}
+# Fixed-width columns of the NUBASE2020 table: (name, start, stop)
+nubase_fields = [("A",0,3),("Zi",4,8),("Ael",11,16),("s_type",16,17),("Mass",18,31),("dMass",31,42),("Exc",42,54),("dExc",54,65),("Orig",65,67),("Isom_Unc",67,68),("Isom_Inv",68,69),("T12",69,78),("T12_unit",78,80),("dT12",81,88),("Jpi",88,102),("Ensdf_year",102,104),("Discov_year",114,118),("BR",118,208)]
 
-elements={"h": 1, "he": 2, "li": 3, "be": 4, "b": 5, "c": 6, "n": 7, "o": 8, "f": 9, "ne": 10, "na": 11, "mg": 12, "al": 13, 
-"si": 14, "p": 15, "s": 16, "cl": 17, "ar": 18, "k": 19, "ca": 20, "sc": 21, "ti": 22, "v": 23, "cr": 24, "mn": 25, "fe": 26,
- "co": 27, "ni": 28, "cu": 29, "zn": 30, "ga": 31, "ge": 32, "as": 33, "se": 34, "br": 35, "kr": 36, "rb": 37, "sr": 38, "y": 39,
-  "zr": 40, "nb": 41, "mo": 42, "tc": 43, "ru": 44, "rh": 45, "pd": 46, "ag": 47, "cd": 48, "in": 49, "sn": 50, "sb": 51, "te": 52,
-   "i": 53, "xe": 54, "cs": 55, "ba": 56, "la": 57, "ce": 58, "pr": 59, "nd": 60, "pm": 61, "sm": 62, "eu": 63, "gd": 64, "tb": 65,
-    "dy": 66, "ho": 67, "er": 68, "tm": 69, "yb": 70, "lu": 71, "hf": 72, "ta": 73, "w": 74, "re": 75, "os": 76, "ir": 77, "pt": 78,
-     "au": 79, "hg": 80, "tl": 81, "pb": 82, "bi": 83, "po": 84, "at": 85, "rn": 86, "fr": 87, "ra": 88, "ac": 89, "th": 90, "pa": 91,
-      "u": 92, "np": 93, "pu": 94, "am": 95, "cm": 96, "bk": 97, "cf": 98, "es": 99, "fm": 100, "md": 101, "no": 102, "lr": 103, "rf": 104,
-       "db": 105, "sg": 106, "bh": 107, "hs": 108, "mt": 109, "ds": 110, "rg": 111, "cn": 112, "nh": 113, "fl": 114, "mc": 115, "lv": 116, "ts": 117, "og": 118,
-	   "119": 119,"120": 120,"121": 121,"122": 122,"123": 123,"124": 124,"125": 125,"126": 126,"127": 127,"128": 128,"129": 129,"130": 130,
-	   "131": 131,"132": 132,"133": 133,"134": 134,"135": 135,"136": 136}
+long_lived_units = ["Zy","My","Ey","Gy","Yy","Py","Ty"]
 
-Zele = []
-Zele.append("n")
-for key in elements:
-	Zele.append(key)
-
-def getnamebyz(z):
+@cached_parse(version=1)
+def read_nubase(infile):
 	"""
-	Get element name by atomic number Z
+	Read all fixed-width fields of the nubase file into a structured array
 	
 	Parameters:
-	   z ( int ): Atomic number Z
+	   infile ( str ): File path-name
 	"""
-	return Zele[z]
+	return from_columns(read_fixed_width(infile, nubase_fields))
 
-def getZ(input):
+@cached_parse(version=1)
+def read_nubase_branches(infile):
 	"""
-	Get atomic number Z by element name
+	Read the decay branches of every nubase entry (see decaymodes.parse_branches)
 	
 	Parameters:
-	   input ( str ): Element name
+	   infile ( str ): File path-name
 	"""
-	if (input==""):
-		return -8888
-	else:
-		sep=re.split('(\d+)',input)
-		if len(sep)==1:
-			if sep[0]=="n":
-				return int(0)
-			elif (sep[0]=="p" or sep[0]=="d" or sep[0]=="t"):
-				return int(1)			
-			else:
-				print("Something wrong! ",input)
-		else:
-			return int(elements[sep[0]])
+	return parse_branches(read_nubase(infile)["BR"])
 
-def getA(input):
+def text_values(text):
 	"""
-	Get mass number A by element name
-	
+	Convert a column of NUBASE numbers to floats, dropping the "#" (systematics) and "<", ">", "~" (limit) marks, -9999 for blank or non-numeric fields
+
 	Parameters:
-	   input ( str ): Element name
+	   text ( array ): Text fields, e.g. "-16320#" or ">100"
 	"""
-	if (input==""):
-		return -9999
-	else:
-		sep=re.split('(\d+)',input)
-		if len(sep)==1:
-			if sep[0]=="n":
-				return 1
-			elif sep[0]=="p":
-				return 1
-			elif sep[0]=="d":
-				return 2
-			elif sep[0]=="t":
-				return 3
-			else:
-				print("Something wrong! ",input)
-		else:
-			return int(sep[1])
+	(unique, inverse) = np.unique(text, return_inverse=True)
+	values = np.full(len(unique), -9999.)
+	for (i, field) in enumerate(unique):
+		try:
+			values[i] = float(field.strip("#<>~ "))
+		except ValueError:
+			pass
+	return values[inverse]
 
-def load_txt(infile):
+def nubase_states(infile):
 	"""
-	Load nubase file and write it to an array of dictionaries
-	
+	Build the typed table of every NUBASE state: ground states, isomers, levels, resonances and IAS
+
+	The "iso" column is the NUBASE isomer index (0 for ground states) and
+	"key" the packed (Z, N, iso) key of nuclideindex.state_keys. Masses and
+	excitation energies are in keV, half-lives in s (inf when stable), with
+	-9999 for missing or non-numeric values; "systematics" flags values
+	estimated from systematics ("#") and "T12_limit" keeps the "<", ">" or
+	"~" of a half-life limit. Ensdf_year is the full year.
+
 	Parameters:
 	   infile ( str ): File path-name
 	"""
-	n_lines = sum(1 for line in open(infile))
-	file1 = open(infile);
-	count = 0
-	nubase=[]
-	nubase_stable=[]
-	nubase_bminus=[]
-	nubase_bplus=[]
-	nubase_alpha=[]
-	while True:
-		count+=1
-		line1 = file1.readline()
-		if (not line1):
-			break
-		if (line1[0]=="#"):
-			continue
-		line1 = line1[0:len(line1)-1]
-		if len(line1)<220:
-			for i in range(220-len(line1)):
-				line1 = line1+" "
-		line1 = bytes(line1,encoding='utf8')
-
-		(A,Zi,Ael,s_type,Mass,dMass,Exc,dExc,Orig,Isom_Unc,Isom_Inv,T12,T12_unit,dT12,Jpi,Ensdf_year,Discov_year,BR) = struct.unpack("3s1x4s3x5s1s1x13s11s12s11s2s1s1s9s2s1x7s14s2s10x4s90s12x",line1)
-		(A,Zi,Ael,s_type,Mass,dMass,Exc,dExc,Orig,Isom_Unc,Isom_Inv,T12,T12_unit,dT12,Jpi,Ensdf_year,Discov_year,BR) = map(lambda x: x.decode('utf-8').strip(),(A,Zi,Ael,s_type,Mass,dMass,Exc,dExc,Orig,Isom_Unc,Isom_Inv,T12,T12_unit,dT12,Jpi,Ensdf_year,Discov_year,BR))
-		
-		# Process data
-		A = int(A)
-		Z = int(Zi[0:3])
-		N = int(A)-int(Zi[0:3])
-		is_gs = False
-		if (Zi[3:4]=="0"):
-			is_gs = True
-
-		# Save data
-		if (T12=="stbl" or T12_unit=="Zy" or T12_unit=="My" or T12_unit=="Ey" or T12_unit=="Gy" or T12_unit=="Yy" or T12_unit=="Py" or T12_unit=="Ty" or T12_unit=="My"):
-			nubase_stable.append({"A":A,"Z":Z,"N":N})
-		if (len(BR)>2):
-			if ((BR[0:2] == "B+" or BR[0:2] == "IT") and is_gs and T12_unit!="Zy" and T12_unit!="My" and T12_unit!="Ey" and T12_unit!="Gy" and T12_unit!="Yy" and T12_unit!="Py" and T12_unit!="Ty" and T12_unit!="My"):
-				#if (T12[-1]!="#"):
-				nubase_bplus.append({"A":A,"Z":Z,"N":N})
-		if (len(BR)>1):
-			if (BR[0:1] == "A" and T12_unit!="" and dT12!="" and is_gs and T12_unit!="Zy" and T12_unit!="My" and T12_unit!="Ey" and T12_unit!="Gy" and T12_unit!="Yy" and T12_unit!="Py" and T12_unit!="Ty" and T12_unit!="My"):
-				if (T12[-1]!="#"):
-					nubase_alpha.append({"A":A,"Z":Z,"N":N})
+	nubase = read_nubase(infile)
+	A = nubase["A"].astype(int)
+	Z = nubase["Zi"].astype("U3").astype(int)
+	iso = nubase["Zi"].astype("U4").astype(int)%10
+	(T12, unit) = (text_values(nubase["T12"]), nubase["T12_unit"])
+	factor = np.array([time_factor.get(key, -9999.) for key in unit])
+	known = (T12!=-9999) & (factor>0)
+	dT12 = text_values(nubase["dT12"])
+	Exc = text_values(nubase["Exc"])
+	Exc[(iso==0) & (Exc==-9999)] = 0
+	ensdf = text_values(nubase["Ensdf_year"]).astype(int)
+	return from_columns({
+		"A": A, "Z": Z, "N": A-Z, "iso": iso, "key": state_keys(Z, A-Z, iso), "state": nubase["s_type"],
+		"Mass": text_values(nubase["Mass"]), "dMass": text_values(nubase["dMass"]), "Exc": Exc, "dExc": text_values(nubase["dExc"]),
+		"systematics": np.char.endswith(nubase["Mass"], "#") | np.char.endswith(nubase["Exc"], "#"),
+		"Orig": nubase["Orig"], "Isom_Unc": nubase["Isom_Unc"]=="*", "Isom_Inv": nubase["Isom_Inv"]=="&",
+		"T12": np.where(nubase["T12"]=="stbl", np.inf, np.where(known, T12*factor, -9999.)),
+		"dT12": np.where(known & (dT12!=-9999), dT12*factor, -9999.),
+		"T12_limit": np.where(np.isin(nubase["T12"].astype("U1"), ["<", ">", "~"]), nubase["T12"].astype("U1"), ""),
+		"T12_systematics": np.char.endswith(nubase["T12"], "#"),
+		"Jpi": nubase["Jpi"],
+		"Ensdf_year": np.where(ensdf<0, -9999, np.where(ensdf<50, 2000+ensdf, 1900+ensdf)).astype("i4"),
+		"Discov_year": text_values(nubase["Discov_year"]).astype("i4"),
+		"BR": nubase["BR"],
+	})
 
-		# for Beta minus
-		if (len(BR)>2):
-			if ((BR[0:2] == "B-" or BR[0:2] == "EC") and T12_unit!="" and dT12!="" and is_gs and T12_unit!="Zy" and T12_unit!="My" and T12_unit!="Ey" and T12_unit!="Gy" and T12_unit!="Yy" and T12_unit!="Py" and T12_unit!="Ty"):
-				if (T12[-1]!="#"):
-					time_f = time_factor[T12_unit]
-					T12 = time_f * float(T12)
-					dT12 = time_f * float(T12)
-					P1n = 0.
-					dP1n = 0.
-					P2n = 0.
-					dP2n = 0.
-					if (BR.find("B-n")!=-1):
-						if (BR.find("B-n ?")!=-1 or BR.find("B-n=?")!=-1 or BR.find("B-n= ?")!=-1):
-							P1n = -9999.
-						else:
-							val = BR.split(";")
-							if (val[1][0:4]=="B-n<" or val[1][0:4]=="B-n~" or val[1][0:4]=="B-n>"):
-								if (val[1][0:4]=="B-n<"):
-									P1n = -9999.
-								if (val[1][0:4]=="B-n>"):
-									P1n = -9999.
-								if (val[1][0:4]=="B-n~"):
-									valP1n = val[1][4:].split()
-									P1n = float(valP1n[0])
-									if (len(valP1n)>1):
-										dP1n = float(valP1n[1])
-							else:
-								valP1n = val[1][4:].split()
-								P1n = float(valP1n[0])
-								if (len(valP1n)>1):
-									dP1n = float(valP1n[1])
-					if (BR.find("B-2n")!=-1):
-						if (BR.find("B-2n ?")!=-1 or BR.find("B-2n=?")!=-1 or BR.find("B-2n= ?")!=-1):
-							P2n = -9999.
-						else:
-							val = BR.split(";")
-							if (val[2][0:5]=="B-2n<" or val[2][0:5]=="B-2n~" or val[2][0:5]=="B-2n>"):
-								if (val[2][0:5]=="B-2n<"):
-									P2n = -9999.
-								if (val[2][0:5]=="B-2n>"):
-									P2n = -9999.
-								if (val[2][0:5]=="B-2n~"):
-									valP2n = val[2][5:].split()
-									P2n = float(valP2n[0])
-									if (len(valP2n)>1):
-										dP2n = float(valP2n[1])
-							else:
-								valP2n = val[2][5:].split()
-								P2n = float(valP2n[0])
-								if (len(valP2n)>1):
-									dP2n = float(valP2n[1])
-					nubase_bminus.append({"A":A,"Z":Z,"N":N, "T12":T12, "dT12":dT12, "P1n": P1n, "dP1n": dP1n, "P2n": P2n, "dP2n": dP2n})
-	np.save("nubase_stable.npy",nubase_stable)
-	np.save("nubase_bminus.npy",nubase_bminus)
-	np.save("nubase_bplus.npy",nubase_bplus)
-	np.save("nubase_alpha.npy",nubase_alpha)
-
-load_txt('nubase_3.mas20.txt')
-
-def drawbox(N,Z,fcolor='None',ecolor='gray', falpha = 1,linewidth=1):
+def load_txt(infile):
 	"""
-	Draw box
+	Load nubase file and write every state, and the stable, B-, B+ and alpha nuclides to structured arrays
 	
 	Parameters:
-	   N ( int ): Neutron number
-	   P ( int ): Proton number
-	   ecolor ( str ): Color code
+	   infile ( str ): File path-name
 	"""
-	rec = plt.Rectangle((N-0.5,Z-0.5),1,1,facecolor=fcolor,edgecolor=ecolor,alpha = falpha)
-	#plt.text(N-0.4,Z-0.1,'$\mathregular{^{'+str(Z+N)+'}'+elements[Z]+'}$')
-	return rec 
+	save_table("nubase_states.npy",nubase_states(infile))
+	nubase = read_nubase(infile)
+	(A,Zi,T12,T12_unit,dT12,BR) = (nubase["A"],nubase["Zi"],nubase["T12"],nubase["T12_unit"],nubase["dT12"],nubase["BR"])
+
+	# Process data
+	A = A.astype(int)
+	Z = Zi.astype("U3").astype(int)
+	N = A-Z
+	is_gs = np.char.endswith(Zi,"0")
+	BR_len = np.char.str_len(BR)
+	branches = read_nubase_branches(infile)
+	BR_mode = first_mode(branches,len(BR))
+	long_lived = np.isin(T12_unit,long_lived_units)
+	has_T12 = (T12_unit!="") & (dT12!="") & ~np.char.endswith(T12,"#")
+
+	# Save data
+	is_stable = (T12=="stbl") | long_lived
+	is_bplus = (BR_len>2) & (np.char.startswith(BR_mode,"B+") | np.char.startswith(BR_mode,"IT")) & is_gs & ~long_lived
+	is_alpha = (BR_len>1) & np.char.startswith(BR_mode,"A") & has_T12 & is_gs & ~long_lived
+	is_bminus = (BR_len>2) & (np.char.startswith(BR_mode,"B-") | np.char.startswith(BR_mode,"EC")) & has_T12 & is_gs & ~long_lived
+	for (outfile,sel) in (("nubase_stable.npy",is_stable),("nubase_bplus.npy",is_bplus),("nubase_alpha.npy",is_alpha)):
+		save_table(outfile,from_columns({"A":A[sel],"Z":Z[sel],"N":N[sel]}))
+
+	# for Beta minus
+	units,unit_index = np.unique(T12_unit[is_bminus],return_inverse=True)
+	time_f = np.array([time_factor[unit] for unit in units])[unit_index]
+	T12_bminus = time_f * T12[is_bminus].astype(float)
+	dT12_bminus = text_values(dT12[is_bminus])
+	dT12_bminus = np.where(dT12_bminus!=-9999, time_f*dT12_bminus, -9999.)
+	P1n,dP1n = branch_ratio(branches,len(BR),"B-n")
+	P2n,dP2n = branch_ratio(branches,len(BR),"B-2n")
+	save_table("nubase_bminus.npy",from_columns({"A":A[is_bminus],"Z":Z[is_bminus],"N":N[is_bminus], "T12":T12_bminus, "dT12":dT12_bminus, "P1n": P1n[is_bminus], "dP1n": dP1n[is_bminus], "P2n": P2n[is_bminus], "dP2n": dP2n[is_bminus]}))
 
 def plot_nubase():
-	magic_num = [2, 8, 20, 28, 50, 82, 126]
-	for i in magic_num:
-		plt.axhline(y=i+0.5,color='b',linestyle='--',linewidth=0.2)
-		plt.axhline(y=i-0.5,color='b',linestyle='--',linewidth=0.2)
-		plt.axvline(x=i+0.5,color='b',linestyle='--',linewidth=0.2)
-		plt.axvline(x=i-0.5,color='b',linestyle='--',linewidth=0.2)
+	plot_magic_lines()
 
-	data_bound = np.load("data_bound.npy",allow_pickle='TRUE')
-	for i in range(len(data_bound)):
-		plt.gca().add_patch(drawbox(data_bound[i]["N"],data_bound[i]["Z"],fcolor='gray',ecolor='None',falpha = 0.5))
-	nubase_stable = np.load("nubase_stable.npy",allow_pickle='TRUE')
-	for i in range(len(nubase_stable)):
-		plt.gca().add_patch(drawbox(nubase_stable[i]["N"],nubase_stable[i]["Z"],fcolor='k',ecolor='None',falpha = 1))
+	data_bound = load_table("data_bound.npy")
+	draw_layer(data_bound["N"],data_bound["Z"],fcolor='gray',ecolor='None',falpha = 0.5)
+	nubase_stable = load_table("nubase_stable.npy")
+	draw_layer(nubase_stable["N"],nubase_stable["Z"],fcolor='k',ecolor='None',falpha = 1)
 
-	nubase_bminus = np.load("nubase_bminus.npy",allow_pickle='TRUE')
-	for i in range(len(nubase_bminus)):
-		plt.gca().add_patch(drawbox(nubase_bminus[i]["N"],nubase_bminus[i]["Z"],fcolor='g',ecolor='k',falpha = 1,linewidth=0.001))
-	nubase_bplus = np.load("nubase_bplus.npy",allow_pickle='TRUE')
-	for i in range(len(nubase_bplus)):
-		plt.gca().add_patch(drawbox(nubase_bplus[i]["N"],nubase_bplus[i]["Z"],fcolor='r',ecolor='k',falpha = 1,linewidth=0.001))
-	nubase_alpha = np.load("nubase_alpha.npy",allow_pickle='TRUE')
-	for i in range(len(nubase_alpha)):
-		plt.gca().add_patch(drawbox(nubase_alpha[i]["N"],nubase_alpha[i]["Z"],fcolor='y',ecolor='k',falpha = 1,linewidth=0.001))
-	
-	plt.xlabel('Neutron number, $N$')
-	plt.ylabel('Proton number, $Z$')
-	plt.xlim([9.5,200])
-	plt.ylim([9.5,116])
-	
-# plot_nubase()
-# plt.show()
+	nubase_bminus = load_table("nubase_bminus.npy")
+	draw_layer(nubase_bminus["N"],nubase_bminus["Z"],fcolor='g',ecolor='k',falpha = 1)
+	nubase_bplus = load_table("nubase_bplus.npy")
+	draw_layer(nubase_bplus["N"],nubase_bplus["Z"],fcolor='r',ecolor='k',falpha = 1)
+	nubase_alpha = load_table("nubase_alpha.npy")
+	draw_layer(nubase_alpha["N"],nubase_alpha["Z"],fcolor='y',ecolor='k',falpha = 1)
+	set_chart_axes()
 
 def load_iaea_crp(infile):
 	"""
-	Load IAEA_CRP file and write it to an array of dictionaries
+	Load the ground states of an IAEA_CRP file with every column and save them to iaea_crp_bdn.npy, and all its states with their NUBASE data to iaea_crp_bdn_states.npy
 	
 	Parameters:
 	   infile ( str ): File path-name
 	"""
-	n_lines = sum(1 for line in open(infile))
-	file1 = open(infile);
-	count = 0
-	iaea_crp_bdn = []
-	while True:
-		count+=1
-		line1 = file1.readline()
-		if (not line1):
-			break
-		if (line1[0]=="#"):
-			continue
-		line1 = line1.strip()
-		val = line1.split()
-		# for i in val:
-		# 	print(val)
-		Z = float(val[1])
-		A = float(val[2])
-		liso = float(val[3])
-		# Skipping isomer
-		if (liso!=0):
-			continue
-		iaea_crp_bdn.append({"A":A,"Z":Z,"N":A-Z})
-	np.save("iaea_crp_bdn.npy",iaea_crp_bdn)
+	iaea_crp_bdn = read_iaea_crp_table(infile)
+	save_table("iaea_crp_bdn.npy",iaea_crp_bdn)
+	save_crp_states(infile,"iaea_crp_bdn_states.npy")
 
 def plot_iaea_crp_bdn():
-	iaea_crp_bdn = np.load("iaea_crp_bdn.npy",allow_pickle='TRUE')
-	for i in range(len(iaea_crp_bdn)):
-		plt.gca().add_patch(drawbox(iaea_crp_bdn[i]["N"],iaea_crp_bdn[i]["Z"],fcolor='m',ecolor='k',falpha = 1,linewidth=0.001))
-
-load_iaea_crp("211114_listofeval_exp.txt")
+	iaea_crp_bdn = load_table("iaea_crp_bdn.npy")
+	draw_layer(iaea_crp_bdn["N"],iaea_crp_bdn["Z"],fcolor='m',ecolor='k',falpha = 1)
 
 def nubase_bminus_addFRDMQRPAPxn():
-	nubase_bminus = np.load("nubase_bminus.npy",allow_pickle='TRUE')
-	datafrdmqrpa_pxn_t12 = np.load("datafrdmqrpa_pxn_t12.npy",allow_pickle='TRUE')
-	for i in range(len(nubase_bminus)):
-		if (nubase_bminus[i]["P1n"]<0):
-			match_entry = next((item for item in datafrdmqrpa_pxn_t12 if (item["Z"] == nubase_bminus[i]["Z"] and item["N"] == nubase_bminus[i]["N"])), None)
-			if (match_entry==None):
-				nubase_bminus[i]["P1n"]=0
-			else:
-				nubase_bminus[i]["P1n"] = match_entry["P1n"]*100
-		if (nubase_bminus[i]["P2n"]<0):
-			match_entry = next((item for item in datafrdmqrpa_pxn_t12 if (item["Z"] == nubase_bminus[i]["Z"] and item["N"] == nubase_bminus[i]["N"])), None)
-			if (match_entry==None):
-				nubase_bminus[i]["P2n"]=0
-			else:
-				nubase_bminus[i]["P2n"] = match_entry["P2n"]*100
-	np.save("nubase_bminus_addFRDMQRPAPxn.npy",nubase_bminus)
-nubase_bminus_addFRDMQRPAPxn()		
-
-
-#plot_nubase()
-#plot_iaea_crp_bdn()
+	nubase_bminus = load_table("nubase_bminus.npy")
+	datafrdmqrpa_pxn_t12 = load_table("datafrdmqrpa_pxn_t12.npy")
+	# Unknown (negative) P1n and P2n are taken from FRDM+QRPA in %, or 0 when it lacks the nuclide
+	match = GridIndex(datafrdmqrpa_pxn_t12).rows(nubase_bminus["Z"],nubase_bminus["N"])
+	for Pxn in ("P1n","P2n"):
+		unknown = nubase_bminus[Pxn]<0
+		nubase_bminus[Pxn][unknown & (match<0)] = 0
+		nubase_bminus[Pxn][unknown & (match>=0)] = datafrdmqrpa_pxn_t12[Pxn][match[unknown & (match>=0)]]*100
+	save_table("nubase_bminus_addFRDMQRPAPxn.npy",nubase_bminus)
 
 def data_add_to_iaeacrp_bdn():
-	iaea_crp_bdn = np.load("iaea_crp_bdn.npy",allow_pickle='TRUE')
-	nubase_stable = np.load("nubase_stable.npy",allow_pickle='TRUE')
-	nubase_bminus_addFRDMQRPAPxn = np.load("nubase_bminus_addFRDMQRPAPxn.npy",allow_pickle='TRUE')
-	datafrdmqrpa_pxn_t12 = np.load("datafrdmqrpa_pxn_t12.npy",allow_pickle='TRUE')
-	#data not overlap with iaea_crp_bdn
-	nubase_bminus_add_to_iaeacrp_bdn = []
-	for i in range(len(nubase_bminus_addFRDMQRPAPxn)):
-		match_entry_nubase_bminus_addFRDMQRPAPxn = next((item for item in iaea_crp_bdn if (item["Z"] == nubase_bminus_addFRDMQRPAPxn[i]["Z"] and item["N"] == nubase_bminus_addFRDMQRPAPxn[i]["N"])), None)
-		if (match_entry_nubase_bminus_addFRDMQRPAPxn==None):
-			nubase_bminus_add_to_iaeacrp_bdn.append(nubase_bminus_addFRDMQRPAPxn[i])
-	
-	datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn = []
-	for i in range(len(datafrdmqrpa_pxn_t12)):
-		match_entry_datafrdmqrpa_pxn_t12 = next((item for item in iaea_crp_bdn if (item["Z"] == datafrdmqrpa_pxn_t12[i]["Z"] and item["N"] == datafrdmqrpa_pxn_t12[i]["N"])), None)
-		if (match_entry_datafrdmqrpa_pxn_t12==None):
-			datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn.append(datafrdmqrpa_pxn_t12[i])
+	"""
+	Find the NUBASE B-, FRDM+QRPA and stable ground states not in the 211114 IAEA CRP list, keyed by (Z, N)
 
-	datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep = []
-	for i in range(len(datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn)):
-		match_entry_datafrdmqrpa_pxn_t12 = next((item for item in nubase_bminus_add_to_iaeacrp_bdn if (item["Z"] == datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn[i]["Z"] and item["N"] == datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn[i]["N"])), None)
-		if (match_entry_datafrdmqrpa_pxn_t12==None):
-			datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep.append(datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn[i])
-	nubase_stable_add_to_iaea_crp = []
-	for i in range(len(nubase_stable)):
-		match_entry_nubase_stable = next((item for item in iaea_crp_bdn if (item["Z"] == nubase_stable[i]["Z"] and item["N"] == nubase_stable[i]["N"])), None)
-		if (match_entry_nubase_stable==None):
-			nubase_stable_add_to_iaea_crp.append(nubase_stable[i])
+	The isomers of the list are not compared: they stay in iaea_crp_bdn_states.npy.
+	"""
+	iaea_crp_bdn = load_table("iaea_crp_bdn.npy")
+	nubase_stable = load_table("nubase_stable.npy")
+	nubase_bminus_addFRDMQRPAPxn = load_table("nubase_bminus_addFRDMQRPAPxn.npy")
+	datafrdmqrpa_pxn_t12 = load_table("datafrdmqrpa_pxn_t12.npy")
+	#data not overlap with iaea_crp_bdn, in order of precedence IAEA CRP, NUBASE, FRDM+QRPA
+	iaea_crp_index = GridIndex(iaea_crp_bdn)
+	nubase_bminus_add_to_iaeacrp_bdn = nubase_bminus_addFRDMQRPAPxn[iaea_crp_index.rows(nubase_bminus_addFRDMQRPAPxn["Z"],nubase_bminus_addFRDMQRPAPxn["N"])<0]
+	datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn = datafrdmqrpa_pxn_t12[iaea_crp_index.rows(datafrdmqrpa_pxn_t12["Z"],datafrdmqrpa_pxn_t12["N"])<0]
+	nubase_index = GridIndex(nubase_bminus_add_to_iaeacrp_bdn)
+	datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep = datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn[nubase_index.rows(datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn["Z"],datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn["N"])<0]
+	nubase_stable_add_to_iaea_crp = nubase_stable[iaea_crp_index.rows(nubase_stable["Z"],nubase_stable["N"])<0]
 	
-	np.save("datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep.npy",datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep)
-	np.save("nubase_bminus_add_to_iaeacrp_bdn.npy",nubase_bminus_add_to_iaeacrp_bdn)
-	np.save("nubase_stable_add_to_iaea_crp.npy",nubase_stable_add_to_iaea_crp)
+	save_table("datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep.npy",datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep)
+	save_table("nubase_bminus_add_to_iaeacrp_bdn.npy",nubase_bminus_add_to_iaeacrp_bdn)
+	save_table("nubase_stable_add_to_iaea_crp.npy",nubase_stable_add_to_iaea_crp)
 
 def plot_complement_data():
-	magic_num = [2, 8, 20, 28, 50, 82, 126]
-	for i in magic_num:
-		plt.axhline(y=i+0.5,color='b',linestyle='--',linewidth=0.2)
-		plt.axhline(y=i-0.5,color='b',linestyle='--',linewidth=0.2)
-		plt.axvline(x=i+0.5,color='b',linestyle='--',linewidth=0.2)
-		plt.axvline(x=i-0.5,color='b',linestyle='--',linewidth=0.2)
-	data_bound = np.load("data_bound.npy",allow_pickle='TRUE')
-	for i in range(len(data_bound)):
-		plt.gca().add_patch(drawbox(data_bound[i]["N"],data_bound[i]["Z"],fcolor='gray',ecolor='None',falpha = 0.5))
-	nubase_stable_add_to_iaea_crp = np.load("nubase_stable_add_to_iaea_crp.npy",allow_pickle='TRUE')
-	for i in range(len(nubase_stable_add_to_iaea_crp)):
-		plt.gca().add_patch(drawbox(nubase_stable_add_to_iaea_crp[i]["N"],nubase_stable_add_to_iaea_crp[i]["Z"],fcolor='k',ecolor='None',falpha = 1))
-	datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep = np.load("datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep.npy",allow_pickle='TRUE')
-	for i in range(len(datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep)):
-		plt.gca().add_patch(drawbox(datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep[i]["N"],datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep[i]["Z"],fcolor='g',ecolor='k',falpha = 1,linewidth=0.001))
-	nubase_bminus_add_to_iaeacrp_bdn = np.load("nubase_bminus_add_to_iaeacrp_bdn.npy",allow_pickle='TRUE')
-	for i in range(len(nubase_bminus_add_to_iaeacrp_bdn)):
-		plt.gca().add_patch(drawbox(nubase_bminus_add_to_iaeacrp_bdn[i]["N"],nubase_bminus_add_to_iaeacrp_bdn[i]["Z"],fcolor='r',ecolor='k',falpha = 1,linewidth=0.001))
-	iaea_crp_bdn = np.load("iaea_crp_bdn.npy",allow_pickle='TRUE')
-	for i in range(len(iaea_crp_bdn)):
-		plt.gca().add_patch(drawbox(iaea_crp_bdn[i]["N"],iaea_crp_bdn[i]["Z"],fcolor='y',ecolor='k',falpha = 1,linewidth=0.001))
-	plt.xlabel('Neutron number, $N$')
-	plt.ylabel('Proton number, $Z$')
-	plt.xlim([9.5,200])
-	plt.ylim([9.5,116])
-
-data_add_to_iaeacrp_bdn()
-plot_complement_data()
+	plot_magic_lines()
+	data_bound = open_mapped("data_bound.npy")
+	draw_layer(data_bound["N"],data_bound["Z"],fcolor='gray',ecolor='None',falpha = 0.5)
+	nubase_stable_add_to_iaea_crp = open_mapped("nubase_stable_add_to_iaea_crp.npy")
+	draw_layer(nubase_stable_add_to_iaea_crp["N"],nubase_stable_add_to_iaea_crp["Z"],fcolor='k',ecolor='None',falpha = 1)
+	datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep = open_mapped("datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep.npy")
+	draw_layer(datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep["N"],datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep["Z"],fcolor='g',ecolor='k',falpha = 1)
+	nubase_bminus_add_to_iaeacrp_bdn = open_mapped("nubase_bminus_add_to_iaeacrp_bdn.npy")
+	draw_layer(nubase_bminus_add_to_iaeacrp_bdn["N"],nubase_bminus_add_to_iaeacrp_bdn["Z"],fcolor='r',ecolor='k',falpha = 1)
+	iaea_crp_bdn = open_mapped("iaea_crp_bdn.npy")
+	draw_layer(iaea_crp_bdn["N"],iaea_crp_bdn["Z"],fcolor='y',ecolor='k',falpha = 1)
+	set_chart_axes()
 
 def make_txt_complement_data():
 	file1 = open("211114_listofeval_exp.txt");
@@ -375,21 +222,37 @@ def make_txt_complement_data():
 		line1 = line1[0:len(line1)-1]
 		print(line1)
 	print("#New data added from FRDM+QRPA")
-	datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep = np.load("datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep.npy",allow_pickle='TRUE')
+	datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep = load_table("datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep.npy")
 	# for i in range(len(datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep)):
 	#  	print(datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep[i]["A"],datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep[i]["Z"])
 	print("#New data added from NUBASE2019 -  beta minus data")
-	nubase_bminus_add_to_iaeacrp_bdn = np.load("nubase_bminus_add_to_iaeacrp_bdn.npy",allow_pickle='TRUE')
+	nubase_bminus_add_to_iaeacrp_bdn = load_table("nubase_bminus_add_to_iaeacrp_bdn.npy")
 	for i in range(len(nubase_bminus_add_to_iaeacrp_bdn)):
 		print(nubase_bminus_add_to_iaeacrp_bdn[i]["A"],nubase_bminus_add_to_iaeacrp_bdn[i]["Z"])
 		#print("	0	0	0	100	0	0	0	0	0	0	0	0	0	"+"	0.668	0.02	0.02	0.668	0.02	0.02	86.4	0	0")	
 	
 	print("#New data added from NUBASE2019 - stable data")
-	nubase_stable_add_to_iaea_crp = np.load("nubase_stable_add_to_iaea_crp.npy",allow_pickle='TRUE')
+	nubase_stable_add_to_iaea_crp = load_table("nubase_stable_add_to_iaea_crp.npy")
 	for i in range(len(nubase_stable_add_to_iaea_crp)):
 		print(str(nubase_stable_add_to_iaea_crp[i]["A"])+getnamebyz(nubase_stable_add_to_iaea_crp[i]["Z"]).capitalize()+"	"+str(nubase_stable_add_to_iaea_crp[i]["Z"])+"	"+str(nubase_stable_add_to_iaea_crp[i]["A"])+ "	0	0	0	100	0	0	0	0	0	0	0	0	0	1.00E+20	0	0	0	0	0	0	0	0.668	0.02	0.02	0.668	0.02	0.02	0	0	0")	
 	#nucid	Z	A	liso	energy_[keV]	D_energy_[keV]	beta-_%	D_beta-	AME2021_Qb	AME2020_D_Qb	AME2020_Qb1n	AME2020_D_Qb1n	AME2021_Qb2n	AME2021_D_Qb2n	Qb3n	D_Qb3n	T12	D_T12	P1n	D_P1n	P2n	D_P2n	P3n	D_P3n	Neueff_1n	lowerEff	upperEff	Neueff_2n	lowerEff	upperEff	D_T12_Hi	D_P1n_Hi	D_P2n_Hi
 	#141Ce	58	141	0	0	0	100	0	0	0	0	0	0	0	0	0	2808691	86.4	0	0	0	0	0	0	0.668	0.02	0.02	0.668	0.02	0.02	86.4	0	0
-make_txt_complement_data()
 
-plt.show()
\ No newline at end of file
+def run():
+	"""
+	Run the nubase stage: classify NUBASE, merge FRDM+QRPA Pxn and find the data not in the IAEA CRP list
+	"""
+	load_txt('nubase_3.mas20.txt')
+	load_iaea_crp("211114_listofeval_exp.txt")
+	nubase_bminus_addFRDMQRPAPxn()
+	data_add_to_iaeacrp_bdn()
+
+def main():
+	import matplotlib.pyplot as plt
+	run()
+	plot_complement_data()
+	make_txt_complement_data()
+	plt.show()
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,178 @@
+"""This contains a schema-driven streaming reader of the IAEA CRP evaluation lists"""
+
+import itertools
+
+import numpy as np
+
+from nuclideindex import StateIndex, state_keys
+from nuctable import from_columns, load_table, save_table
+from parsecache import cached_parse
+
+# Header name, column name and dtype of every known column of the evaluation lists.
+# lowerEff/upperEff appear twice in the header, first for the 1n and then for the 2n efficiency.
+crp_schema = [
+	("nucid","nucid","U8"),("Z","Z","i4"),("A","A","i4"),("liso","liso","i4"),
+	("energy_[keV]","energy","f8"),("D_energy_[keV]","denergy","f8"),("beta-_%","Pbeta","f8"),("D_beta-","dPbeta","f8"),
+	("AME2021_Qb","Qb","f8"),("AME2020_D_Qb","dQb","f8"),("AME2020_Qb1n","Qb1n","f8"),("AME2020_D_Qb1n","dQb1n","f8"),
+	("AME2021_Qb2n","Qb2n","f8"),("AME2021_D_Qb2n","dQb2n","f8"),("Qb3n","Qb3n","f8"),("D_Qb3n","dQb3n","f8"),
+	("T12","T12","f8"),("D_T12","dT12","f8"),("P1n","P1n","f8"),("D_P1n","dP1n","f8"),
+	("P2n","P2n","f8"),("D_P2n","dP2n","f8"),("P3n","P3n","f8"),("D_P3n","dP3n","f8"),
+	("Neueff_1n","Neueff_1n","f8"),("lowerEff","lowerEff_1n","f8"),("upperEff","upperEff_1n","f8"),
+	("Neueff_2n","Neueff_2n","f8"),("lowerEff","lowerEff_2n","f8"),("upperEff","upperEff_2n","f8"),
+	("D_T12_Hi","dT12hi","f8"),("D_P1n_Hi","dP1nhi","f8"),("D_P2n_Hi","dP2nhi","f8"),
+]
+
+def header_columns(header):
+	"""
+	Map the names of a header line to (column name, dtype) pairs
+
+	The k-th occurrence of a header name maps to the k-th schema entry with
+	that name, so repeated names get distinct columns. Names not in the
+	schema are kept as float columns under their own name.
+
+	Parameters:
+	   header ( list ): Names of the header line
+	"""
+	entries = {}
+	for (name, column, dtype) in crp_schema:
+		entries.setdefault(name, []).append((column, dtype))
+	seen = {}
+	columns = []
+	for name in header:
+		k = seen.get(name, 0)
+		seen[name] = k+1
+		if k<len(entries.get(name, [])):
+			columns.append(entries[name][k])
+		else:
+			columns.append((name if k==0 else "%s_%d" % (name, k+1), "f8"))
+	for required in ("Z", "A", "liso"):
+		if required not in [column for (column, dtype) in columns]:
+			raise ValueError("IAEA CRP header has no %s column" % required)
+	return columns
+
+def column_values(values, dtype):
+	"""
+	Convert a column of text fields to its dtype, integers may be written as floats
+
+	Parameters:
+	   values ( array ): Text fields
+	   dtype ( str ): Column dtype
+	"""
+	if dtype.startswith("U"):
+		return values.astype(dtype)
+	return values.astype(float).astype(dtype)
+
+def iter_iaea_crp(infile, batch_size=4096):
+	"""
+	Read an IAEA CRP evaluation list as a generator of structured-array batches
+
+	Only batch_size lines are held in memory at a time. The column names and
+	types come from the "#nucid Z A liso ..." header line through crp_schema;
+	without a header the columns are in schema order. Every batch also has an
+	"N" column.
+
+	Parameters:
+	   infile ( str ): File path-name
+	   batch_size ( int ): Maximum number of rows per batch
+	"""
+	columns = [(column, dtype) for (name, column, dtype) in crp_schema]
+	with open(infile) as file1:
+		lines = (line.split() for line in file1 if line.strip())
+		for fields in lines:
+			if fields[0].startswith("#"):
+				names = [fields[0][1:]] + fields[1:] if fields[0]!="#" else fields[1:]
+				if "nucid" in names:
+					columns = header_columns(names)
+				continue
+			rows = [fields] + [row for row in itertools.islice(lines, batch_size-1) if not row[0].startswith("#")]
+			if any(len(row)!=len(columns) for row in rows):
+				raise ValueError("%s: rows with %s fields, expected %d" % (infile, sorted({len(row) for row in rows}), len(columns)))
+			values = np.array(rows).T
+			batch = {column: column_values(values[i], dtype) for (i, (column, dtype)) in enumerate(columns)}
+			batch["N"] = batch["A"] - batch["Z"]
+			yield from_columns(batch)
+
+def concatenate_batches(batches):
+	"""
+	Concatenate table batches into one column dictionary, the empty schema columns without batches
+
+	Parameters:
+	   batches ( list ): Structured arrays with the same fields
+	"""
+	if batches:
+		return {key: np.concatenate([batch[key] for batch in batches]) for key in batches[0].dtype.names}
+	return {column: np.zeros(0, dtype=dtype) for (name, column, dtype) in crp_schema + [("N","N","i4")]}
+
+def with_source(columns):
+	"""
+	Make a table of IAEA CRP columns with a "source" column set to "iaeacrp"
+
+	Parameters:
+	   columns ( dict ): Column arrays keyed by name
+	"""
+	columns = dict(columns, source=np.full(len(columns["Z"]), "iaeacrp"))
+	return from_columns(columns)
+
+@cached_parse(version=1)
+def read_iaea_crp_table(infile, isomers=False, batch_size=4096):
+	"""
+	Read a whole IAEA CRP evaluation list into one structured array, with a "source" column set to "iaeacrp"
+
+	Parameters:
+	   infile ( str ): File path-name
+	   isomers ( bool ): Keep isomeric states (liso!=0)
+	   batch_size ( int ): Number of rows parsed at a time
+	"""
+	batches = [batch if isomers else batch[batch["liso"]==0] for batch in iter_iaea_crp(infile, batch_size)]
+	return with_source(concatenate_batches(batches))
+
+def crp_states(crp, nubase_states, index=None):
+	"""
+	Join every state of an IAEA CRP list to its NUBASE state
+
+	Adds the packed (Z, N, liso) state "key" and the NUBASE excitation
+	energy "Exc_nubase" (keV), spin and parity "Jpi" and half-life
+	"T12_nubase" (s) of the state with the same isomer index, -9999 and ""
+	when NUBASE lacks it.
+
+	Parameters:
+	   crp ( list ): IAEA CRP table read with isomers=True, or one batch of iter_iaea_crp
+	   nubase_states ( list ): NUBASE states, see getnubase.nubase_states
+	   index ( StateIndex ): Index of nubase_states, built when None
+	"""
+	index = StateIndex(nubase_states) if index is None else index
+	rows = index.rows(crp["Z"], crp["N"], crp["liso"])
+	(found, rows) = (rows>=0, np.maximum(rows, 0))
+	columns = {key: crp[key] for key in crp.dtype.names}
+	columns["key"] = state_keys(crp["Z"], crp["N"], crp["liso"])
+	columns["Exc_nubase"] = np.where(found, nubase_states["Exc"][rows], -9999.)
+	columns["Jpi"] = np.where(found, nubase_states["Jpi"][rows], "")
+	columns["T12_nubase"] = np.where(found, nubase_states["T12"][rows], -9999.)
+	return from_columns(columns)
+
+def save_crp_states(infile, outfile, nubase_file="nubase_states.npy", batch_size=4096):
+	"""
+	Save every state of an IAEA CRP list, isomeric precursors included, joined to its NUBASE state
+
+	The list is joined batch by batch as iter_iaea_crp reads it, only the
+	joined states being held until they are saved.
+
+	Parameters:
+	   infile ( str ): IAEA CRP list path-name
+	   outfile ( str ): Output table
+	   nubase_file ( str ): NUBASE states table
+	   batch_size ( int ): Number of rows joined at a time
+	"""
+	nubase_states = load_table(nubase_file)
+	index = StateIndex(nubase_states)
+	(batches, isomers, unmatched) = ([], 0, 0)
+	for batch in iter_iaea_crp(infile, batch_size):
+		states = crp_states(with_source({key: batch[key] for key in batch.dtype.names}), nubase_states, index)
+		isomeric = states["liso"]!=0
+		isomers += np.count_nonzero(isomeric)
+		unmatched += np.count_nonzero(isomeric & (states["Exc_nubase"]==-9999))
+		batches.append(states)
+	states = from_columns(concatenate_batches(batches)) if batches else crp_states(with_source(concatenate_batches([])), nubase_states, index)
+	save_table(outfile, states)
+	print("%d isomeric precursors of %s kept in %s (%d without a NUBASE state)" % (isomers, infile, outfile, unmatched))
+	return states
@@ -0,0 +1,78 @@
+"""This contains a common interface to the nuclear mass models"""
+
+import driplines
+import getFRDM
+import getWS36
+from chart import plot_driplines
+from nuctable import save_table
+
+class MassModel:
+	"""
+	Nuclear mass model read from its table file
+
+	Every model table has at least the "ZA", "N", "Z", "A", "EL", "Ebind"
+	and "Mth" columns, so the dripline engine, the Q-values and the charts
+	work on any model.
+
+	Parameters:
+	   name ( str ): Model name
+	   infile ( str ): Table file path-name
+	   loader ( function ): Reader returning a structured array from infile
+	   suffix ( str ): Suffix of the dripline output file names
+	"""
+	def __init__(self, name, infile, loader, suffix):
+		self.name = name
+		self.infile = infile
+		self.loader = loader
+		self.suffix = suffix
+
+	def load(self):
+		"""
+		Load the model table
+		"""
+		return self.loader(self.infile)
+
+	def separation_energies(self):
+		"""
+		Compute S1n, S2n, S1p, S2p, Qb, Qbn and the bound masks of every nuclide of the model, see driplines.separation_energies
+		"""
+		table = self.load()
+		return driplines.separation_energies(table["Z"], table["N"], table["Ebind"], table["Mth"])
+
+	def getdriplines(self):
+		"""
+		Get bound nuclides and bound nuclides with Qbn>0
+		"""
+		return driplines.getdriplines(self.load())
+
+	def save_driplines(self):
+		"""
+		Save bound nuclides and bound nuclides with Qbn>0 to data_bound<suffix>.npy and data_bound_Qbn<suffix>.npy
+		"""
+		data_bound,data_bound_Qbn = self.getdriplines()
+		save_table("data_bound%s.npy" % self.suffix,data_bound)
+		save_table("data_bound_Qbn%s.npy" % self.suffix,data_bound_Qbn)
+		return data_bound,data_bound_Qbn
+
+	def plot_driplines(self):
+		"""
+		Draw the bound nuclides of the model, and those with Qbn>0 in red
+		"""
+		plot_driplines(*self.getdriplines())
+
+mass_models = {
+	"FRDM2012": MassModel("FRDM2012", "ADNDT-FRDM2012-TABLE.dat", getFRDM.load_txt, ""),
+	"WS3.6": MassModel("WS3.6", "WS3.6.txt", getWS36.load_txt, "_WS36"),
+}
+
+def compare_models(names=None):
+	"""
+	Compare the separation energies, Q-values and driplines of several mass models in one pass, see driplines.compare_models
+
+	The per-model columns of the result follow the order of names.
+
+	Parameters:
+	   names ( list ): Model names, all registered models when None
+	"""
+	names = list(mass_models) if names is None else names
+	return driplines.compare_models([mass_models[name].load() for name in names])
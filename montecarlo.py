@@ -0,0 +1,352 @@
+"""This contains a vectorized Monte Carlo propagation of the asymmetric T1/2 and Pxn uncertainties"""
+
+import concurrent.futures
+
+import numpy as np
+
+from nuctable import MappedTable, from_columns, open_mapped, save_table
+from summation import DecayNetwork
+
+# Lower and upper uncertainty fields of every sampled field
+uncertainty_fields = {"T12": ("dT12", "dT12hi"), "P1n": ("dP1n", "dP1nhi"), "P2n": ("dP2n", "dP2nhi")}
+
+# Sampled half-lives are kept above this fraction of their central value
+min_T12_fraction = 1e-2
+
+# Quantiles summarizing every propagated quantity
+quantiles = [0.025, 0.16, 0.5, 0.84, 0.975]
+
+# Per-process state set by init_worker
+worker_state = {}
+
+def correlation_matrix(T12_P1n=0., T12_P2n=0., P1n_P2n=0.):
+	"""
+	Get the correlation matrix of the T12, P1n and P2n deviates of a nuclide from its pairwise correlations
+
+	Parameters:
+	   T12_P1n ( float ): Correlation of T12 and P1n
+	   T12_P2n ( float ): Correlation of T12 and P2n
+	   P1n_P2n ( float ): Correlation of P1n and P2n
+	"""
+	return np.array([[1., T12_P1n, T12_P2n], [T12_P1n, 1., P1n_P2n], [T12_P2n, P1n_P2n, 1.]])
+
+def errors(data, field):
+	"""
+	Get the lower and upper uncertainties of a field, the upper one being the lower one when not given
+
+	Parameters:
+	   data ( list ): Structured array
+	   field ( str ): Field name, a key of uncertainty_fields
+	"""
+	(low, high) = uncertainty_fields[field]
+	lower = np.clip(np.asarray(data[low], dtype=float), 0, None)
+	upper = np.asarray(data[high], dtype=float) if high in data.dtype.names else lower
+	return lower, np.where(upper>0, upper, lower)
+
+def draw(data, size, rng, method="split", correlation=None):
+	"""
+	Draw realizations of the sampled fields of a table, as (nuclide, realization) arrays keyed by field
+
+	"split" draws split-normal values (standard deviation dX below and
+	dXhi above the value), "lognormal" draws log-normal values with the
+	value as median and dX, dXhi setting the lower and upper log widths.
+	Half-lives stay above min_T12_fraction of their value and branching
+	ratios within [0, 100] with P1n+P2n+P3n <= 100 %. Negative values
+	(unknown) are not sampled.
+
+	Parameters:
+	   data ( list ): Structured array with the fields of uncertainty_fields, branching ratios in %
+	   size ( int ): Number of realizations
+	   rng ( Generator ): Random number generator
+	   method ( str ): "split" or "lognormal"
+	   correlation ( array ): Correlation matrix of the T12, P1n and P2n deviates of a nuclide, independent when None
+	"""
+	fields = list(uncertainty_fields)
+	if correlation is not None:
+		deviates = rng.standard_normal((len(data), size, len(fields))) @ np.linalg.cholesky(correlation).T
+	samples = {}
+	for (k, field) in enumerate(fields):
+		value = np.asarray(data[field], dtype=float)
+		(lower, upper) = errors(data, field)
+		# Only known values with an uncertainty vary
+		known = (value>=0) & ((lower>0) | (upper>0))
+		varying = np.flatnonzero(known)
+		z = deviates[varying, :, k] if correlation is not None else rng.standard_normal((len(varying), size))
+		(value, lower, upper) = (value[varying, None], lower[varying, None], upper[varying, None])
+		if method=="lognormal":
+			positive = value>0
+			safe = np.where(positive, value, 1.)
+			width_upper = np.log1p(upper/safe)
+			width_lower = np.where(lower<safe, -np.log1p(-np.minimum(lower/safe, 1-1e-12)), width_upper)
+			sample = np.where(positive, safe*np.exp(np.where(z<0, width_lower, width_upper)*z), value)
+		elif method=="split":
+			sample = value + np.where(z<0, lower, upper)*z
+		else:
+			raise ValueError("Unknown method %s" % method)
+		samples[field] = np.repeat(np.asarray(data[field], dtype=float)[:, None], size, axis=1)
+		samples[field][varying] = np.maximum(sample, min_T12_fraction*value) if field=="T12" else np.clip(sample, 0, 100)
+	# Scale P1n and P2n down where the branching ratios sum above 100 %
+	P3n = np.clip(np.asarray(data["P3n"], dtype=float), 0, 100)[:, None] if "P3n" in data.dtype.names else np.zeros((len(data), 1))
+	sampled = np.clip(samples["P1n"], 0, None) + np.clip(samples["P2n"], 0, None)
+	scale = np.where(sampled+P3n>100, (100-P3n)/np.where(sampled>0, sampled, 1.), 1.)
+	for field in ("P1n", "P2n"):
+		samples[field] = np.where(samples[field]>0, samples[field]*scale, samples[field])
+	return samples
+
+def branching(network, data, samples):
+	"""
+	Get the branching ratios to the daughters of every table row as a (row, daughter, realization) array
+
+	Parameters:
+	   network ( DecayNetwork ): Decay network of the table
+	   data ( list ): Structured array
+	   samples ( dict ): Realizations returned by draw
+	"""
+	size = next(iter(samples.values())).shape[1]
+	branches = np.stack([np.clip(samples[key] if key in samples else np.broadcast_to(np.asarray(data[key], dtype=float)[:, None], (len(data), size)), 0, None)/100.
+		for key in network.branch_fields], axis=1)
+	probability = np.concatenate([1-branches.sum(axis=1, keepdims=True), branches], axis=1)
+	probability[np.asarray(data["T12"], dtype=float)<=0] = 0
+	return probability
+
+def decay_counts(network, population, probability):
+	"""
+	Get the number of decays of every table row over all times, as a (row, realization) array
+
+	Decays always go from Z to Z+1, so the counts follow from one pass over
+	the Z layers, every realization at once.
+
+	Parameters:
+	   network ( DecayNetwork ): Decay network of the table
+	   population ( array ): Initial population of the network nuclides
+	   probability ( array ): Branching ratios returned by branching
+	"""
+	counts = np.repeat(np.asarray(population, dtype=float)[:, None], probability.shape[2], axis=1)
+	Z = network.nodes["Z"][network.parents]
+	for z in np.unique(Z):
+		rows = np.flatnonzero(Z==z)
+		for j in range(network.daughters.shape[1]):
+			# Distinct parents have distinct daughters for a given j
+			fed = rows[network.daughters[rows, j]>=0]
+			counts[network.daughters[fed, j]] += counts[network.parents[fed]]*probability[fed, j]
+	return counts[network.parents]
+
+def aggregate(keys, *values):
+	"""
+	Sum the (term, realization) values of equal keys, returning the sorted distinct keys and the summed values
+
+	Parameters:
+	   keys ( array ): Integer key of every term
+	   values ( array ): (term, realization) arrays
+	"""
+	import scipy.sparse
+	(distinct, inverse) = np.unique(keys, return_inverse=True)
+	total = scipy.sparse.csr_matrix((np.ones(len(keys)), (inverse, np.arange(len(keys)))), shape=(len(distinct), len(keys)))
+	return (distinct,) + tuple(total @ value for value in values)
+
+def activity(network, data, samples, probability, population, times, rtol=1e-8):
+	"""
+	Get the delayed-neutron activity (neutrons/s) of every realization at the given times, as a (realization, time) array
+
+	Solves the Bateman equations of every realization at once with the
+	layer-by-layer expansion of summation.DecayNetwork.expansion, on terms
+	t^m/m! exp(-l_k t) of the decay constant l_k of every source nuclide k.
+	The decay constants that are equal (within summation.rate_tolerance) in
+	every realization give the exact t^(m+1) terms. The realizations whose
+	estimated rounding error exceeds rtol times their activity, from nearly
+	equal sampled half-lives, are solved again one by one with
+	DecayNetwork.evolve.
+
+	Parameters:
+	   network ( DecayNetwork ): Decay network of the table
+	   data ( list ): Structured array
+	   samples ( dict ): Realizations returned by draw
+	   probability ( array ): Branching ratios returned by branching
+	   population ( array ): Initial population of the network nuclides
+	   times ( array ): Times (s)
+	   rtol ( float ): Relative tolerance
+	"""
+	from scipy.special import factorial
+	from summation import rate_tolerance
+	(size, realizations, T12) = (network.size, probability.shape[2], samples["T12"])
+	rate = np.where(T12>0, np.log(2)/np.where(T12>0, T12, 1.), 0.)
+	decay_constant = np.zeros((size, realizations))
+	decay_constant[network.parents] = rate
+	neutrons = np.zeros((size, realizations))
+	neutrons[network.parents] = np.einsum("j,rjs->rs", network.multiplicity, probability[:, 1:])
+	emission = decay_constant*neutrons
+	first = decay_constant[:, 0]
+	fixed = np.all(decay_constant==first[:, None], axis=1)
+	# Decays of every (parent, daughter) edge, sorted by parent
+	(rows, daughter) = np.nonzero((network.daughters>=0) & (probability>0).any(axis=2))
+	(parent, weight) = (network.parents[rows], rate[rows]*probability[rows, daughter])
+	daughter = network.daughters[rows, daughter]
+	order = np.argsort(parent, kind="stable")
+	(parent, daughter, weight) = (parent[order], daughter[order], weight[order])
+	population = np.asarray(population, dtype=float)
+	Z = network.nodes["Z"]
+	starts = np.flatnonzero(np.concatenate([[True], Z[1:]!=Z[:-1]]))
+	ends = np.concatenate([starts[1:], [size]])
+	(result, bound) = (np.zeros((realizations, len(times))), np.zeros((realizations, len(times))))
+	# (nuclide, source, power) keys sorted by nuclide, with their coefficients and magnitudes
+	(previous, powers) = (None, 2)
+	for (s, e) in zip(starts, ends):
+		node = s + np.flatnonzero(population[s:e])
+		terms = [(node, node, np.zeros(len(node), dtype=int), np.repeat(population[node, None], realizations, axis=1), np.repeat(np.abs(population[node, None]), realizations, axis=1))]
+		if previous is not None and Z[s]==Z[previous[0]]+1:
+			(term_node, term_source, term_power, term_coefficient, term_magnitude) = previous[1]
+			edges = np.flatnonzero((parent>=previous[0]) & (parent<s))
+			(low, high) = (np.searchsorted(term_node, parent[edges], "left"), np.searchsorted(term_node, parent[edges], "right"))
+			# Every term of a parent flows to each of its daughters
+			count = high-low
+			edge = np.repeat(edges, count)
+			term = np.arange(count.sum()) - np.repeat(np.cumsum(count)-count, count) + np.repeat(low, count)
+			(i, k, m) = (daughter[edge], term_source[term], term_power[term])
+			(keys, coefficient, magnitude) = aggregate((i.astype(np.int64)*size + k)*powers + m, weight[edge]*term_coefficient[term], weight[edge]*term_magnitude[term])
+			(i, k, m) = (keys//powers//size, keys//powers%size, keys%powers)
+			same = fixed[i] & fixed[k] & (np.abs(first[i]-first[k])<=rate_tolerance*np.maximum(first[i], first[k]))
+			terms.append((i[same], k[same], m[same]+1, coefficient[same], magnitude[same]))
+			(i, k, m, coefficient, magnitude) = (i[~same], k[~same], m[~same], coefficient[~same], magnitude[~same])
+			with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+				inverse = 1/(decay_constant[i]-decay_constant[k])
+				# factor = (-1)^q/(l_i-l_k)^(q+1) of the power m-q, q = m giving the exp(-l_i t) term
+				(factor, homogeneous) = (inverse, np.empty_like(inverse))
+				for q in range(m.max()+1 if len(m) else 0):
+					sel = m>=q
+					terms.append((i[sel], k[sel], m[sel]-q, coefficient[sel]*factor[sel], magnitude[sel]*np.abs(factor[sel])))
+					homogeneous[m==q] = factor[m==q]
+					factor = -factor*inverse
+				terms.append((i, i, np.zeros(len(i), dtype=int), -coefficient*homogeneous, magnitude*np.abs(homogeneous)))
+		(i, k, m, coefficient, magnitude) = [np.concatenate(values) for values in zip(*terms)]
+		powers = max(powers, m.max()+2 if len(m) else 0)
+		(keys, coefficient, magnitude) = aggregate((i.astype(np.int64)*size + k)*powers + m, coefficient, magnitude)
+		(i, k, m) = (keys//powers//size, keys//powers%size, keys%powers)
+		emitting = emission[i].any(axis=1)
+		for (n, t) in enumerate(times):
+			with np.errstate(invalid="ignore"):
+				basis = emission[i[emitting]]*(t**m[emitting]/factorial(m[emitting]))[:, None]*np.exp(-decay_constant[k[emitting]]*t)
+				result[:, n] += (coefficient[emitting]*basis).sum(axis=0)
+				bound[:, n] += (magnitude[emitting]*basis).sum(axis=0)
+		previous = (s, (i, k, m, coefficient, magnitude))
+	for r in np.flatnonzero(~np.all(np.finfo(float).eps*bound<=rtol*np.abs(result), axis=1)):
+		realization = data.copy()
+		for (key, value) in samples.items():
+			realization[key] = value[:, r]
+		decays = DecayNetwork(realization)
+		populations = decays.evolve(decays.population(network.nodes["Z"], network.nodes["N"], population), times, rtol=rtol)
+		result[r] = decays.neutron_activity(populations)[0]
+	return result
+
+def init_worker(indir, Z, N, values, times, thresholds):
+	"""
+	Open the shared memory-mapped decay table and build its decay network in a worker process
+
+	Parameters:
+	   indir ( str ): Column directory of the decay table
+	   Z ( array ): Proton numbers of the initial population
+	   N ( array ): Neutron numbers of the initial population
+	   values ( array ): Initial population of every nuclide
+	   times ( array ): Times (s) of the delayed-neutron activity
+	   thresholds ( array ): Neutron emission probabilities (%) counted by the "emitters" quantity
+	"""
+	table = MappedTable(indir)
+	data = from_columns({name: np.asarray(table[name]) for name in table.names if table[name].ndim==1})
+	network = DecayNetwork(data)
+	worker_state.update(data=data, network=network, population=network.population(Z, N, values),
+		times=np.asarray(times, dtype=float), thresholds=np.asarray(thresholds, dtype=float))
+
+def propagate_chunk(seed, size, method="split", correlation=None):
+	"""
+	Draw a chunk of realizations in a worker and get their downstream quantities
+
+	Returns the (realization, ...) arrays of the summed delayed-neutron
+	"yield" (neutrons per unit of initial population), of the
+	delayed-neutron "activity" (neutrons/s) at the worker times, see
+	activity, and of the number of "emitters" with a neutron emission
+	probability (%) above every threshold.
+
+	Parameters:
+	   seed ( SeedSequence ): Seed of the chunk
+	   size ( int ): Number of realizations
+	   method ( str ): "split" or "lognormal", see draw
+	   correlation ( array ): Correlation matrix of the T12, P1n and P2n deviates, see draw
+	"""
+	(data, network, population, times) = (worker_state["data"], worker_state["network"], worker_state["population"], worker_state["times"])
+	samples = draw(data, size, np.random.default_rng(seed), method, correlation)
+	probability = branching(network, data, samples)
+	counts = decay_counts(network, population, probability)
+	emitted = counts*np.einsum("j,rjs->rs", network.multiplicity, probability[:, 1:])
+	result = activity(network, data, samples, probability, population, times)
+	# Only the rows with neutron emission in some realization are precursors
+	emission = 100*probability[np.flatnonzero(emitted.any(axis=1)), 1:].sum(axis=1)
+	return {
+		"yield": emitted.sum(axis=0),
+		"activity": result,
+		"emitters": np.stack([(emission>=threshold).sum(axis=0) for threshold in worker_state["thresholds"]], axis=1),
+	}
+
+def propagate(infile, Z, N, values, size=10000, times=(0., 1., 10., 100.), thresholds=(1., 10., 50.), method="split",
+	correlation=None, seed=0, chunk_size=2000, jobs=None):
+	"""
+	Propagate the T1/2 and Pxn uncertainties of a decay table to the delayed-neutron quantities of an initial population
+
+	The table is converted once to a memory-mapped column store shared by
+	the worker processes, and every chunk of chunk_size realizations gets
+	its own child seed, so the results do not depend on jobs. Returns the
+	per-realization quantities of propagate_chunk concatenated over chunks.
+
+	Parameters:
+	   infile ( str ): Decay table saved by save_table, branching ratios in %
+	   Z ( array ): Proton numbers of the initial population
+	   N ( array ): Neutron numbers of the initial population
+	   values ( array ): Initial population of every nuclide, e.g. independent fission yields
+	   size ( int ): Number of realizations
+	   times ( array ): Times (s) of the delayed-neutron activity
+	   thresholds ( array ): Neutron emission probabilities (%) counted by the "emitters" quantity
+	   method ( str ): "split" or "lognormal", see draw
+	   correlation ( array ): Correlation matrix of the T12, P1n and P2n deviates, see draw
+	   seed ( int ): Seed of the whole run
+	   chunk_size ( int ): Number of realizations per task
+	   jobs ( int ): Number of worker processes
+	"""
+	sizes = [min(chunk_size, size-start) for start in range(0, size, chunk_size)]
+	seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+	initargs = (open_mapped(infile).indir, np.asarray(Z), np.asarray(N), np.asarray(values), np.asarray(times), np.asarray(thresholds))
+	with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=initargs) as pool:
+		chunks = list(pool.map(propagate_chunk, seeds, sizes, [method]*len(sizes), [correlation]*len(sizes)))
+	return {key: np.concatenate([chunk[key] for chunk in chunks]) for key in chunks[0]}
+
+def summarize(values):
+	"""
+	Get the mean, standard deviation and quantiles of every per-realization quantity
+
+	Parameters:
+	   values ( dict ): Quantities returned by propagate
+	"""
+	return {key: {"mean": value.mean(axis=0), "std": value.std(axis=0), "quantiles": np.quantile(value, quantiles, axis=0)}
+		for (key, value) in values.items()}
+
+def run(infile, data="iaea_crp_nubase_combined_220327.npy", size=10000, method="split", jobs=None, outstem="montecarlo", correlation=None,
+	states="iaea_crp_bdn_220327_states.npy"):
+	"""
+	Run a Monte Carlo propagation for an initial population file and save the realizations to <outstem>.npy
+
+	Parameters:
+	   infile ( str ): Initial population file with "Z A yield" columns, see summation.load_yields
+	   data ( str ): Decay data table, branching ratios in %
+	   size ( int ): Number of realizations
+	   method ( str ): "split" or "lognormal", see draw
+	   jobs ( int ): Number of worker processes
+	   outstem ( str ): Output file path-name without extension
+	   correlation ( array ): Correlation matrix of the T12, P1n and P2n deviates, see correlation_matrix, independent when None
+	   states ( str ): States table of the isomers left out of data, see summation.report_isomers
+	"""
+	from summation import load_yields, report_isomers
+	report_isomers(data, states)
+	(Z, N, values) = load_yields(infile)
+	result = propagate(data, Z, N, values, size, method=method, correlation=correlation, jobs=jobs)
+	table = np.zeros(size, dtype=[(key, value.dtype, value.shape[1:]) for (key, value) in result.items()])
+	for (key, value) in result.items():
+		table[key] = value
+	save_table(outstem + ".npy", table)
+	return summarize(result)
@@ -0,0 +1,204 @@
+"""Command line interface of the evaluation pipeline"""
+
+import argparse
+import importlib
+import sys
+
+# Pipeline stages and the module running each of them
+stage_modules = {
+	"frdmqrpa": "getFRDMQRPA",
+	"frdm": "getFRDM",
+	"ws36": "getWS36",
+	"nubase": "getnubase",
+	"combine": "combinedata",
+}
+
+def run_stage(args):
+	importlib.import_module(stage_modules[args.command]).run()
+
+def build(args):
+	import pipeline
+	return 1 if pipeline.build(args.targets, args.jobs, args.force) else 0
+
+def plot(args):
+	import matplotlib.pyplot as plt
+	if args.figure=="complement":
+		import getnubase
+		getnubase.plot_complement_data()
+	elif args.figure=="combined":
+		import combinedata
+		combinedata.plotcombineddata()
+	elif args.figure=="nubase":
+		import getnubase
+		getnubase.plot_nubase()
+	if args.output:
+		plt.savefig(args.output)
+	else:
+		plt.show()
+
+def export(args):
+	import chartexport
+	specs = chartexport.load_specs(args.specs) if args.specs else chartexport.default_specs
+	if args.only:
+		specs = [spec for spec in specs if spec["name"] in args.only]
+	for outfile in chartexport.export_charts(specs, args.outdir, args.formats, args.jobs):
+		print(outfile)
+
+def model_driplines(args):
+	import massmodels
+	model = massmodels.mass_models[args.model]
+	model.save_driplines()
+	if args.plot or args.output:
+		import matplotlib.pyplot as plt
+		model.plot_driplines()
+		if args.output:
+			plt.savefig(args.output)
+		else:
+			plt.show()
+
+def compare(args):
+	import massmodels
+	from nuctable import save_table
+	names = args.models or list(massmodels.mass_models)
+	result = massmodels.compare_models(names)
+	save_table(args.output, result)
+	for (m, name) in enumerate(names):
+		print("%-10s bound %5d   bound Qbn>0 %5d" % (name, result["bound"][:, m].sum(), result["bound_Qbn"][:, m].sum()))
+	print("Models disagree on bound for %d and on bound Qbn>0 for %d nuclides" % ((~result["bound_agree"]).sum(), (~result["bound_Qbn_agree"]).sum()))
+
+def coverage(args):
+	import coveragegaps
+	summary = coveragegaps.run(args.model, args.list, args.output)["summary"]
+	print(", ".join("%s %d" % item for item in summary.items()))
+
+def summation(args):
+	import summation
+	result = summation.run(args.yields, args.data, args.times, args.output)
+	for (t, activity) in zip(result["times"], result["activity"]):
+		print("%12.5g s  %12.5g n/s" % (t, activity))
+
+def montecarlo(args):
+	import numpy as np
+	import montecarlo
+	correlation = montecarlo.correlation_matrix(*args.correlation) if args.correlation else None
+	summary = montecarlo.run(args.yields, args.data, args.size, args.method, args.jobs, args.output, correlation)
+	for (key, stats) in summary.items():
+		print("%-9s mean %s  std %s" % (key, np.array2string(np.atleast_1d(stats["mean"]), precision=5), np.array2string(np.atleast_1d(stats["std"]), precision=5)))
+
+def paths(args):
+	import re
+	import decaypaths
+	from nuclides import getZ, nuclide_labels
+	decay_paths = decaypaths.run(args.output)
+	for name in args.nuclides:
+		# "137Sn" labels, as written by nuclide_labels, to the "sn137" names of getZ
+		(A, element) = re.match(r"(\d+)(\D+)", name).groups()
+		(Z, A) = (getZ(element.lower() + A), int(A))
+		ends = decay_paths.end_products(Z, A-Z)
+		print(name + ": " + ", ".join("%s %.4g%s" % (label, probability, "" if stable else " (unstable)")
+			for (label, probability, stable) in zip(nuclide_labels(ends["A"], ends["Z"]), ends["probability"], ends["stable"])))
+
+def states(args):
+	import re
+	from nuclideindex import StateIndex
+	from nuclides import getZ
+	from nuctable import load_table
+	nubase_states = load_table("nubase_states.npy")
+	index = StateIndex(nubase_states)
+	for name in args.nuclides:
+		(A, element) = re.match(r"(\d+)(\D+)", name).groups()
+		(Z, A) = (getZ(element.lower() + A), int(A))
+		rows = index.states(Z, A-Z) if args.iso is None else [row for row in [index.row(Z, A-Z, args.iso)] if row is not None]
+		for state in nubase_states[rows]:
+			print("%-8s iso %d %-2s Exc %10.2f keV  T1/2 %-11.4g s  Jpi %-13s %s" % (name, state["iso"], state["state"], state["Exc"], state["T12"], state["Jpi"], state["BR"]))
+
+def view(args):
+	import matplotlib.pyplot as plt
+	import chartexport
+	import viewer
+	specs = chartexport.load_specs(args.specs) if args.specs else chartexport.default_specs
+	spec = next(spec for spec in specs if spec["name"]==args.name)
+	chart_viewer = viewer.ChartViewer(spec)
+	plt.show()
+
+def complement_txt(args):
+	import getnubase
+	getnubase.make_txt_complement_data()
+
+def main(argv=None):
+	"""
+	Parse the command line and run the selected subcommand, returning the exit code
+
+	Parameters:
+	   argv ( list ): Command line arguments, sys.argv[1:] when None
+	"""
+	parser = argparse.ArgumentParser(prog="nubasecrp", description="NUBASE / IAEA CRP beta-delayed neutron evaluation pipeline")
+	subparsers = parser.add_subparsers(dest="command", required=True)
+	for name, module in stage_modules.items():
+		subparser = subparsers.add_parser(name, help="run the %s stage (%s.py)" % (name, module))
+		subparser.set_defaults(func=run_stage)
+	subparser = subparsers.add_parser("build", help="incrementally rebuild the pipeline")
+	subparser.add_argument("targets", nargs="*", help="stages to build: " + ", ".join(stage_modules))
+	subparser.add_argument("-j", "--jobs", type=int, default=None, help="maximum number of concurrent stages")
+	subparser.add_argument("-f", "--force", action="store_true", help="rebuild every required stage")
+	subparser.set_defaults(func=build)
+	subparser = subparsers.add_parser("plot", help="draw a chart of nuclides from the saved tables")
+	subparser.add_argument("figure", nargs="?", default="complement", choices=["complement", "combined", "nubase"])
+	subparser.add_argument("-o", "--output", default=None, help="save to this file instead of showing the figure")
+	subparser.set_defaults(func=plot)
+	subparser = subparsers.add_parser("export", help="render chart variants to files in a process pool")
+	subparser.add_argument("specs", nargs="?", default=None, help="JSON file with a list of chart specs, the default variants when omitted")
+	subparser.add_argument("-o", "--outdir", default="charts", help="output directory")
+	subparser.add_argument("-f", "--formats", nargs="+", default=["png"], choices=["png", "pdf", "svg"], help="output formats")
+	subparser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes")
+	subparser.add_argument("--only", nargs="+", default=None, help="names of the specs to render")
+	subparser.set_defaults(func=export)
+	subparser = subparsers.add_parser("driplines", help="save (and draw) the driplines of a mass model")
+	subparser.add_argument("model", choices=["FRDM2012", "WS3.6"])
+	subparser.add_argument("--plot", action="store_true", help="draw the driplines")
+	subparser.add_argument("-o", "--output", default=None, help="save the drawing to this file instead of showing it")
+	subparser.set_defaults(func=model_driplines)
+	subparser = subparsers.add_parser("compare", help="compare the driplines and Q-values of mass models in one pass")
+	subparser.add_argument("models", nargs="*", help="models to compare (FRDM2012, WS3.6), all when omitted")
+	subparser.add_argument("-o", "--output", default="driplines_compare.npy", help="output table")
+	subparser.set_defaults(func=compare)
+	subparser = subparsers.add_parser("coverage", help="write the coverage-gap report of the bound Qbn>0 nuclides as CSV and JSON")
+	subparser.add_argument("--model", default="FRDM2012", choices=["FRDM2012", "WS3.6"], help="mass model giving the bound Qbn>0 nuclides")
+	subparser.add_argument("--list", default="220327", choices=["211114", "220327"], help="IAEA CRP evaluation list")
+	subparser.add_argument("-o", "--output", default=None, help="output path-name without extension, coverage_<model>_<list> when omitted")
+	subparser.set_defaults(func=coverage)
+	subparser = subparsers.add_parser("summation", help="evolve an initial population (e.g. fission yields) and write its delayed-neutron activity")
+	subparser.add_argument("yields", help="initial population file with Z, A and yield columns")
+	subparser.add_argument("--data", default="iaea_crp_nubase_combined_220327.npy", help="decay data table, branching ratios in %%")
+	subparser.add_argument("--times", nargs="+", type=float, default=None, help="times in s, 0 and log-spaced from 0.01 to 1000 s when omitted")
+	subparser.add_argument("-o", "--output", default="summation", help="output path-name without extension")
+	subparser.set_defaults(func=summation)
+	subparser = subparsers.add_parser("montecarlo", help="propagate the asymmetric T1/2 and Pxn uncertainties to the delayed-neutron yield and activity")
+	subparser.add_argument("yields", help="initial population file with Z, A and yield columns")
+	subparser.add_argument("--data", default="iaea_crp_nubase_combined_220327.npy", help="decay data table, branching ratios in %%")
+	subparser.add_argument("-n", "--size", type=int, default=10000, help="number of realizations")
+	subparser.add_argument("--method", default="split", choices=["split", "lognormal"], help="distribution of the values")
+	subparser.add_argument("--correlation", nargs=3, type=float, default=None, metavar=("T12_P1N", "T12_P2N", "P1N_P2N"),
+		help="correlations of the T1/2, P1n and P2n deviates of a nuclide, independent when omitted")
+	subparser.add_argument("-j", "--jobs", type=int, default=None, help="number of worker processes")
+	subparser.add_argument("-o", "--output", default="montecarlo", help="output path-name without extension")
+	subparser.set_defaults(func=montecarlo)
+	subparser = subparsers.add_parser("paths", help="trace the beta-delayed neutron decay paths of every emitter to its end products")
+	subparser.add_argument("nuclides", nargs="*", help="nuclides whose end products are printed, e.g. 137Sn")
+	subparser.add_argument("-o", "--output", default="decay_paths.npy", help="output end-product summary table")
+	subparser.set_defaults(func=paths)
+	subparser = subparsers.add_parser("states", help="print the NUBASE ground state and isomers of nuclides")
+	subparser.add_argument("nuclides", nargs="+", help="nuclides, e.g. 129In")
+	subparser.add_argument("--iso", type=int, default=None, help="only the state with this isomer index, 0 for the ground state")
+	subparser.set_defaults(func=states)
+	subparser = subparsers.add_parser("view", help="open an interactive chart showing the data of the nuclide under the cursor")
+	subparser.add_argument("name", nargs="?", default="combined_220327", help="name of the chart spec to show")
+	subparser.add_argument("--specs", default=None, help="JSON file with a list of chart specs, the default variants when omitted")
+	subparser.set_defaults(func=view)
+	subparser = subparsers.add_parser("complement-txt", help="print the complement data as IAEA CRP table rows")
+	subparser.set_defaults(func=complement_txt)
+	args = parser.parse_args(argv)
+	return args.func(args) or 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,166 @@
+"""This contains a grid index of nuclide tables keyed by (Z, N), and a sorted index of nuclear states keyed by (Z, N, isomer)"""
+
+import numpy as np
+
+def state_keys(Z, N, iso=0):
+	"""
+	Get one integer key per nuclear state, ordered like (Z, N, iso)
+
+	Parameters:
+	   Z ( array ): Proton numbers
+	   N ( array ): Neutron numbers
+	   iso ( array ): Isomer indexes, 0 for ground states
+	"""
+	return (np.asarray(Z, dtype=np.int64)*1000 + np.asarray(N, dtype=np.int64))*10 + np.asarray(iso, dtype=np.int64)
+
+class GridIndex:
+	"""
+	Dense (Z, N) grid index over a nuclide table
+
+	Every cell holds the row number of the first entry with that (Z, N), or -1.
+	Lookups are a single array read, and many nuclides can be looked up at once.
+
+	Parameters:
+	   data ( list ): Structured array or MappedTable with "Z" and "N" columns
+	"""
+	def __init__(self, data):
+		self.data = data
+		Z = np.asarray(data["Z"], dtype=int)
+		N = np.asarray(data["N"], dtype=int)
+		self.grid = np.full((Z.max()+1 if len(Z) else 0, N.max()+1 if len(N) else 0), -1, dtype=np.int64)
+		# np.unique gives the first row of duplicated nuclides
+		(cells, first) = np.unique(np.ravel_multi_index((Z, N), self.grid.shape), return_index=True)
+		self.grid.flat[cells] = first
+
+	def __len__(self):
+		return int(np.count_nonzero(self.grid>=0))
+
+	def __contains__(self, key):
+		return self.row(*key) is not None
+
+	def rows(self, Z, N):
+		"""
+		Get row numbers of many nuclides, -1 for those not in the table
+
+		Parameters:
+		   Z ( array ): Proton numbers
+		   N ( array ): Neutron numbers
+		"""
+		Z = np.asarray(Z, dtype=int)
+		N = np.asarray(N, dtype=int)
+		inside = (Z>=0) & (Z<self.grid.shape[0]) & (N>=0) & (N<self.grid.shape[1])
+		return np.where(inside, self.grid[np.where(inside, Z, 0), np.where(inside, N, 0)] if self.grid.size else -1, -1)
+
+	def row(self, Z, N):
+		"""
+		Get row number of nuclide (Z, N), or None if it is not in the table
+
+		Parameters:
+		   Z ( int ): Proton number
+		   N ( int ): Neutron number
+		"""
+		i = int(self.rows(Z, N))
+		return None if i<0 else i
+
+	def get(self, Z, N, default=None):
+		"""
+		Get entry of nuclide (Z, N), or default if it is not in the table
+
+		Parameters:
+		   Z ( int ): Proton number
+		   N ( int ): Neutron number
+		   default: Value returned for missing nuclides
+		"""
+		i = self.row(Z, N)
+		if (i is None):
+			return default
+		return self.data[i]
+
+class StateIndex:
+	"""
+	Sorted index over a table of nuclear states, keyed by state_keys
+
+	iso is 0 for ground states and the NUBASE isomer index (1 to 9, the
+	IAEA CRP "liso") otherwise. The keys are sorted once so that the states
+	of a nuclide are contiguous: every lookup is a binary search, and many
+	states can be looked up at once.
+
+	Parameters:
+	   data ( list ): Structured array or MappedTable with "Z", "N" and isomer index columns
+	   iso ( str ): Name of the isomer index column
+	"""
+	def __init__(self, data, iso="iso"):
+		self.data = data
+		keys = state_keys(data["Z"], data["N"], data[iso])
+		self.order = np.argsort(keys, kind="stable")
+		self.keys = keys[self.order]
+
+	def __len__(self):
+		return len(self.keys)
+
+	def __contains__(self, key):
+		return self.row(*key) is not None
+
+	def rows(self, Z, N, iso=0):
+		"""
+		Get row numbers of many states, -1 for those not in the table
+
+		Parameters:
+		   Z ( array ): Proton numbers
+		   N ( array ): Neutron numbers
+		   iso ( array ): Isomer indexes, 0 for ground states
+		"""
+		keys = state_keys(Z, N, iso)
+		if len(self.keys)==0:
+			return np.full(keys.shape, -1, dtype=np.int64)
+		i = np.minimum(np.searchsorted(self.keys, keys), len(self.keys)-1)
+		return np.where(self.keys[i]==keys, self.order[i], -1)
+
+	def row(self, Z, N, iso=0):
+		"""
+		Get row number of state (Z, N, iso), or None if it is not in the table
+
+		Parameters:
+		   Z ( int ): Proton number
+		   N ( int ): Neutron number
+		   iso ( int ): Isomer index, 0 for the ground state
+		"""
+		i = int(self.rows(Z, N, iso))
+		return None if i<0 else i
+
+	def ground(self, Z, N):
+		"""
+		Get row numbers of the ground states of many nuclides, -1 for those not in the table
+
+		Parameters:
+		   Z ( array ): Proton numbers
+		   N ( array ): Neutron numbers
+		"""
+		return self.rows(Z, N, 0)
+
+	def states(self, Z, N):
+		"""
+		Get row numbers of all the states of nuclide (Z, N), by increasing isomer index
+
+		Parameters:
+		   Z ( int ): Proton number
+		   N ( int ): Neutron number
+		"""
+		start = np.searchsorted(self.keys, state_keys(Z, N, 0))
+		stop = np.searchsorted(self.keys, state_keys(Z, N, 9), side="right")
+		return self.order[start:stop]
+
+	def get(self, Z, N, iso=0, default=None):
+		"""
+		Get entry of state (Z, N, iso), or default if it is not in the table
+
+		Parameters:
+		   Z ( int ): Proton number
+		   N ( int ): Neutron number
+		   iso ( int ): Isomer index, 0 for the ground state
+		   default: Value returned for missing states
+		"""
+		i = self.row(Z, N, iso)
+		if (i is None):
+			return default
+		return self.data[i]
@@ -0,0 +1,93 @@
+"""This contains element names and nuclide naming helpers shared by the pipeline"""
+
+import re
+
+import numpy as np
+
+# Time unit conversion factors to seconds
+time_factor = {'s':1., 'y':31536000., 'ms': 0.001, 'd' : 86400., 'ky' : 31536000000, 'm' : 60., 'h': 3600.,
+	'us': 1e-6, 'ns': 1e-9, 'ps': 1e-12, 'fs': 1e-15, 'as': 1e-18, 'zs': 1e-21, 'ys': 1e-24,
+	'My': 31536000.*1e6, 'Gy': 31536000.*1e9, 'Ty': 31536000.*1e12, 'Py': 31536000.*1e15, 'Ey': 31536000.*1e18, 'Zy': 31536000.*1e21, 'Yy': 31536000.*1e24}
+
+elements={"h": 1, "he": 2, "li": 3, "be": 4, "b": 5, "c": 6, "n": 7, "o": 8, "f": 9, "ne": 10, "na": 11, "mg": 12, "al": 13, 
+"si": 14, "p": 15, "s": 16, "cl": 17, "ar": 18, "k": 19, "ca": 20, "sc": 21, "ti": 22, "v": 23, "cr": 24, "mn": 25, "fe": 26,
+ "co": 27, "ni": 28, "cu": 29, "zn": 30, "ga": 31, "ge": 32, "as": 33, "se": 34, "br": 35, "kr": 36, "rb": 37, "sr": 38, "y": 39,
+  "zr": 40, "nb": 41, "mo": 42, "tc": 43, "ru": 44, "rh": 45, "pd": 46, "ag": 47, "cd": 48, "in": 49, "sn": 50, "sb": 51, "te": 52,
+   "i": 53, "xe": 54, "cs": 55, "ba": 56, "la": 57, "ce": 58, "pr": 59, "nd": 60, "pm": 61, "sm": 62, "eu": 63, "gd": 64, "tb": 65,
+    "dy": 66, "ho": 67, "er": 68, "tm": 69, "yb": 70, "lu": 71, "hf": 72, "ta": 73, "w": 74, "re": 75, "os": 76, "ir": 77, "pt": 78,
+     "au": 79, "hg": 80, "tl": 81, "pb": 82, "bi": 83, "po": 84, "at": 85, "rn": 86, "fr": 87, "ra": 88, "ac": 89, "th": 90, "pa": 91,
+      "u": 92, "np": 93, "pu": 94, "am": 95, "cm": 96, "bk": 97, "cf": 98, "es": 99, "fm": 100, "md": 101, "no": 102, "lr": 103, "rf": 104,
+       "db": 105, "sg": 106, "bh": 107, "hs": 108, "mt": 109, "ds": 110, "rg": 111, "cn": 112, "nh": 113, "fl": 114, "mc": 115, "lv": 116, "ts": 117, "og": 118,
+	   "119": 119,"120": 120,"121": 121,"122": 122,"123": 123,"124": 124,"125": 125,"126": 126,"127": 127,"128": 128,"129": 129,"130": 130,
+	   "131": 131,"132": 132,"133": 133,"134": 134,"135": 135,"136": 136}
+
+Zele = []
+Zele.append("n")
+for key in elements:
+	Zele.append(key)
+
+def getnamebyz(z):
+	"""
+	Get element name by atomic number Z
+	
+	Parameters:
+	   z ( int ): Atomic number Z
+	"""
+	return Zele[z]
+
+def getZ(input):
+	"""
+	Get atomic number Z by element name
+	
+	Parameters:
+	   input ( str ): Element name
+	"""
+	if (input==""):
+		return -8888
+	else:
+		sep=re.split(r'(\d+)',input)
+		if len(sep)==1:
+			if sep[0]=="n":
+				return int(0)
+			elif (sep[0]=="p" or sep[0]=="d" or sep[0]=="t"):
+				return int(1)			
+			else:
+				print("Something wrong! ",input)
+		else:
+			return int(elements[sep[0]])
+
+def getA(input):
+	"""
+	Get mass number A by element name
+	
+	Parameters:
+	   input ( str ): Element name
+	"""
+	if (input==""):
+		return -9999
+	else:
+		sep=re.split(r'(\d+)',input)
+		if len(sep)==1:
+			if sep[0]=="n":
+				return 1
+			elif sep[0]=="p":
+				return 1
+			elif sep[0]=="d":
+				return 2
+			elif sep[0]=="t":
+				return 3
+			else:
+				print("Something wrong! ",input)
+		else:
+			return int(sep[1])
+
+def nuclide_labels(A, Z):
+	"""
+	Get the "<A><Element>" labels (e.g. 132Sn) of many nuclides at once
+
+	Parameters:
+	   A ( array ): Mass numbers
+	   Z ( array ): Atomic numbers
+	"""
+	names = np.char.capitalize(np.array(Zele))
+	return np.char.add(np.asarray(A, dtype=int).astype(str), names[np.asarray(Z, dtype=int)])
@@ -0,0 +1,128 @@
+"""This contains a set type of nuclides stored as a packed (Z, N) bitmap"""
+
+import numpy as np
+
+# Chart covered by the bitmap: 0 <= Z <= max_Z and 0 <= N <= max_N
+max_Z = 136
+max_N = 511
+
+class NuclideSet:
+	"""
+	Set of nuclides stored as one bit per (Z, N) cell of the chart
+
+	The whole chart takes under 9 kB, and union (|), intersection (&),
+	difference (-) and symmetric difference (^) are single array operations.
+	len gives the number of nuclides and iterating yields (Z, N) pairs
+	sorted by Z then N.
+
+	Parameters:
+	   bits ( array ): Packed bitmap of shape (max_Z+1, (max_N+1)/8), an empty set when None
+	"""
+	def __init__(self, bits=None):
+		if bits is None:
+			bits = np.zeros((max_Z+1, (max_N+1)//8), dtype=np.uint8)
+		self.bits = bits
+
+	@classmethod
+	def from_arrays(cls, Z, N):
+		"""
+		Make the set of the nuclides (Z[i], N[i])
+
+		Parameters:
+		   Z ( array ): Proton numbers
+		   N ( array ): Neutron numbers
+		"""
+		Z = np.asarray(Z, dtype=int)
+		N = np.asarray(N, dtype=int)
+		if (len(Z) and (Z.min()<0 or Z.max()>max_Z or N.min()<0 or N.max()>max_N)):
+			raise ValueError("Nuclide outside of the chart (Z <= %d, N <= %d)" % (max_Z, max_N))
+		grid = np.zeros((max_Z+1, max_N+1), dtype=bool)
+		grid[Z, N] = True
+		return cls(np.packbits(grid, axis=1))
+
+	@classmethod
+	def from_table(cls, data):
+		"""
+		Make the set of the nuclides of a table
+
+		Parameters:
+		   data ( list ): Structured array, MappedTable or array of dictionaries with "Z" and "N" keys
+		"""
+		if isinstance(data, list):
+			return cls.from_arrays([item["Z"] for item in data], [item["N"] for item in data])
+		return cls.from_arrays(data["Z"], data["N"])
+
+	@classmethod
+	def from_mask(cls, Z, N, mask):
+		"""
+		Make the set of the nuclides selected by a mask, e.g. the "bound" or "bound_Qbn" masks of driplines.separation_energies
+
+		Parameters:
+		   Z ( array ): Proton numbers
+		   N ( array ): Neutron numbers
+		   mask ( array ): Boolean selection of the nuclides
+		"""
+		mask = np.asarray(mask, dtype=bool)
+		return cls.from_arrays(np.asarray(Z)[mask], np.asarray(N)[mask])
+
+	def grid(self):
+		"""
+		Get the set as a (Z, N) boolean array
+		"""
+		return np.unpackbits(self.bits, axis=1).astype(bool)
+
+	def arrays(self):
+		"""
+		Get the Z and N arrays of the nuclides, sorted by Z then N
+		"""
+		return np.nonzero(self.grid())
+
+	def contains(self, Z, N):
+		"""
+		Get whether each nuclide (Z[i], N[i]) is in the set
+
+		Parameters:
+		   Z ( array ): Proton numbers
+		   N ( array ): Neutron numbers
+		"""
+		Z = np.asarray(Z, dtype=int)
+		N = np.asarray(N, dtype=int)
+		inside = (Z>=0) & (Z<=max_Z) & (N>=0) & (N<=max_N)
+		(Zi, Ni) = (np.where(inside, Z, 0), np.where(inside, N, 0))
+		return inside & ((self.bits[Zi, Ni>>3] >> (7-(Ni & 7))) & 1).astype(bool)
+
+	def select(self, data):
+		"""
+		Get the entries of a table whose nuclide is in the set, in table order
+
+		Parameters:
+		   data ( list ): Structured array with "Z" and "N" columns
+		"""
+		return data[self.contains(data["Z"], data["N"])]
+
+	def __contains__(self, key):
+		return bool(self.contains(key[0], key[1]))
+
+	def __len__(self):
+		return int(np.unpackbits(self.bits).sum())
+
+	def __iter__(self):
+		return zip(*(x.tolist() for x in self.arrays()))
+
+	def __or__(self, other):
+		return NuclideSet(self.bits | other.bits)
+
+	def __and__(self, other):
+		return NuclideSet(self.bits & other.bits)
+
+	def __sub__(self, other):
+		return NuclideSet(self.bits & ~other.bits)
+
+	def __xor__(self, other):
+		return NuclideSet(self.bits ^ other.bits)
+
+	def __eq__(self, other):
+		return isinstance(other, NuclideSet) and np.array_equal(self.bits, other.bits)
+
+	def __repr__(self):
+		return "NuclideSet(%d nuclides)" % len(self)
@@ -0,0 +1,71 @@
+"""This contains a priority-based merge of nuclide tables from several sources"""
+
+import numpy as np
+
+from nuctable import from_columns
+
+def nuclide_keys(Z, N):
+	"""
+	Get one integer key per nuclide, ordered like (Z, N)
+
+	Parameters:
+	   Z ( array ): Proton numbers
+	   N ( array ): Neutron numbers
+	"""
+	return np.asarray(Z, dtype=np.int64)*1000 + np.asarray(N, dtype=np.int64)
+
+def merge_sources(sources, fields=None, defaults=None, priority=None, source_column="source"):
+	"""
+	Merge nuclide tables with a vectorized outer join on (Z, N), keeping every nuclide from its highest-priority source
+
+	Every nuclide appears once in the output: rows repeating a (Z, N) within
+	one source are dropped like those of lower-priority sources, only the
+	first one being kept. Use a GridIndex mask instead to filter a table
+	against others while keeping its repeated rows.
+
+	Every source is a dictionary with "name" and "table" keys and an
+	optional "fields" dictionary mapping output fields to the source's own
+	fields (e.g. {"dT12hi": "dT12"}). Output rows follow the order of the
+	sources and of the rows within them. Output fields a source lacks take
+	their value from defaults (-9999 when not given). The source_column field
+	records the name of the source of every row, unless it is None.
+
+	Returns the merged structured array and a dictionary giving, for every
+	source name, the rows of its table that were kept.
+
+	Parameters:
+	   sources ( list ): Source dictionaries
+	   fields ( list ): Output field names, those of the first source when None
+	   defaults ( dict ): Values of missing fields keyed by field name
+	   priority ( list ): Source names from highest to lowest priority, the source order when None
+	   source_column ( str ): Name of the provenance field
+	"""
+	defaults = {} if defaults is None else defaults
+	names = [source["name"] for source in sources]
+	priority = names if priority is None else priority
+	if fields is None:
+		fields = [key for key in sources[0]["table"].dtype.names if key!=source_column]
+	keys = np.concatenate([nuclide_keys(source["table"]["Z"], source["table"]["N"]) for source in sources])
+	which = np.concatenate([np.full(len(source["table"]), s) for (s, source) in enumerate(sources)])
+	rows = np.concatenate([np.arange(len(source["table"])) for source in sources])
+	rank = np.array([priority.index(name) for name in names])[which]
+	position = np.arange(len(keys))
+	# Sorted by nuclide, then priority, then position: the first entry of every nuclide wins
+	order = np.lexsort((position, rank, keys))
+	first = np.ones(len(order), dtype=bool)
+	first[1:] = keys[order][1:]!=keys[order][:-1]
+	winners = np.sort(order[first])
+	kept = {name: rows[winners][which[winners]==s] for (s, name) in enumerate(names)}
+	columns = {}
+	for field in fields:
+		dtype = next((source["table"].dtype[source.get("fields", {}).get(field, field)] for source in sources
+			if source.get("fields", {}).get(field, field) in source["table"].dtype.names), np.dtype(float))
+		column = np.full(len(winners), defaults.get(field, -9999), dtype=dtype)
+		for (s, source) in enumerate(sources):
+			own = source.get("fields", {}).get(field, field)
+			if own in source["table"].dtype.names:
+				column[which[winners]==s] = source["table"][own][kept[source["name"]]]
+		columns[field] = column
+	if source_column is not None:
+		columns[source_column] = np.array(names)[which[winners]]
+	return from_columns(columns), kept
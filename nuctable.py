@@ -0,0 +1,155 @@
+"""This contains functions to store nuclide tables as typed NumPy structured arrays"""
+
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Fixed dtypes of the known fields, other fields are inferred from their values
+field_dtypes = {"Z": "i4", "N": "i4", "A": "i4", "ZA": "i4", "exp": "i4", "iso": "i4", "EL": "U3", "source": "U16"}
+
+def field_dtype(key, values):
+	"""
+	Get dtype of a table field
+
+	Parameters:
+	   key ( str ): Field name
+	   values ( list ): Values of the field
+	"""
+	if key in field_dtypes:
+		return field_dtypes[key]
+	if all(isinstance(x, (str, np.str_)) for x in values):
+		return "U%d" % max([len(x) for x in values] + [1])
+	if all(isinstance(x, (int, np.integer)) and not isinstance(x, bool) for x in values):
+		return "i8"
+	return "f8"
+
+def to_table(data):
+	"""
+	Convert an array of dictionaries (or structured records) to a structured array
+
+	Parameters:
+	   data ( list ): Array of dictionaries with the same keys
+	"""
+	if isinstance(data, np.ndarray) and data.dtype.names is not None:
+		return data
+	if len(data)==0:
+		return np.zeros(0, dtype=[("A","i4"),("Z","i4"),("N","i4")])
+	if isinstance(data[0], np.void):
+		keys = data[0].dtype.names
+	else:
+		keys = list(data[0].keys())
+	columns = [[item[key] for item in data] for key in keys]
+	dtype = [(key, field_dtype(key, column)) for key, column in zip(keys, columns)]
+	table = np.zeros(len(data), dtype=dtype)
+	for key, column in zip(keys, columns):
+		table[key] = column
+	return table
+
+def from_columns(columns):
+	"""
+	Build a structured array from a dictionary of equal-length column arrays
+
+	Parameters:
+	   columns ( dict ): Column arrays keyed by field name, in field order
+	"""
+	dtype = [(key, field_dtypes.get(key, np.asarray(column).dtype)) for key, column in columns.items()]
+	table = np.zeros(len(next(iter(columns.values()))), dtype=dtype)
+	for key, column in columns.items():
+		table[key] = column
+	return table
+
+def save_table(outfile, data):
+	"""
+	Save a nuclide table as a structured array, readable without pickle
+
+	Parameters:
+	   outfile ( str ): File path-name
+	   data ( list ): Structured array or array of dictionaries
+	"""
+	np.save(outfile, to_table(data))
+
+def load_table(infile, columns=False, mmap_mode=None):
+	"""
+	Load a nuclide table saved by save_table
+
+	Legacy files holding pickled arrays of dictionaries are converted on the
+	fly. Returns the structured array, whose rows can be read like the
+	dictionaries (e.g. table[i]["Z"]), or a dictionary of column arrays.
+
+	Parameters:
+	   infile ( str ): File path-name
+	   columns ( bool ): Return a dictionary of column arrays
+	   mmap_mode ( str ): Memory-map the file with this mode (e.g. 'r'), ignored for legacy files
+	"""
+	try:
+		table = np.load(infile, mmap_mode=mmap_mode)
+	except ValueError:
+		table = to_table(list(np.load(infile, allow_pickle=True)))
+	if columns:
+		return {key: table[key] for key in table.dtype.names}
+	return table
+
+def save_columns(outdir, data):
+	"""
+	Save a nuclide table as a directory with one .npy file per column
+
+	The directory is written next to its final location and renamed into
+	place, so concurrent readers never see a partial copy.
+
+	Parameters:
+	   outdir ( str ): Directory path-name
+	   data ( list ): Structured array or array of dictionaries
+	"""
+	table = to_table(data)
+	tmpdir = tempfile.mkdtemp(prefix=".tmp", dir=os.path.dirname(os.path.abspath(outdir)))
+	for key in table.dtype.names:
+		np.save(os.path.join(tmpdir, key + ".npy"), np.ascontiguousarray(table[key]))
+	if os.path.isdir(outdir):
+		shutil.rmtree(outdir, ignore_errors=True)
+	try:
+		os.rename(tmpdir, outdir)
+	except OSError:
+		# Another process has just put its copy in place
+		shutil.rmtree(tmpdir, ignore_errors=True)
+
+class MappedTable:
+	"""
+	Read-only nuclide table whose columns are memory-mapped on first access
+
+	Every process opening the same directory shares the operating system
+	page cache, and only the columns that are read are paged in.
+
+	Parameters:
+	   indir ( str ): Directory written by save_columns
+	"""
+	def __init__(self, indir):
+		self.indir = indir
+		self.names = tuple(sorted(f[:-4] for f in os.listdir(indir) if f.endswith(".npy")))
+		self.columns = {}
+
+	def __getitem__(self, key):
+		if isinstance(key, str):
+			if key not in self.columns:
+				self.columns[key] = np.load(os.path.join(self.indir, key + ".npy"), mmap_mode='r')
+			return self.columns[key]
+		return {name: self[name][key] for name in self.names}
+
+	def __len__(self):
+		return len(self[self.names[0]])
+
+def open_mapped(infile):
+	"""
+	Open a nuclide table saved by save_table as a MappedTable
+
+	The column directory (infile with ".columns" instead of ".npy") is
+	(re)built when it is missing or older than infile.
+
+	Parameters:
+	   infile ( str ): File path-name
+	"""
+	outdir = os.path.splitext(infile)[0] + ".columns"
+	if (not os.path.isdir(outdir) or os.path.getmtime(outdir) < os.path.getmtime(infile)):
+		save_columns(outdir, load_table(infile))
+	return MappedTable(outdir)
@@ -0,0 +1,94 @@
+"""This contains a cache of parsed input tables keyed on file content hash"""
+
+import functools
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+from nuctable import to_table
+
+# Cache directory and size bound (bytes), can be overridden by the environment
+cache_dir = os.environ.get("NUBASE_CRP_CACHE", ".nucache")
+cache_max_bytes = int(os.environ.get("NUBASE_CRP_CACHE_MAX_BYTES", 512*1024*1024))
+
+def file_hash(infile):
+	"""
+	Get SHA-256 hex digest of a file's content
+
+	Parameters:
+	   infile ( str ): File path-name
+	"""
+	digest = hashlib.sha256()
+	with open(infile, 'rb') as file1:
+		for block in iter(lambda: file1.read(1<<20), b""):
+			digest.update(block)
+	return digest.hexdigest()
+
+def evict(keep=None):
+	"""
+	Remove least recently used cache entries until the cache fits in cache_max_bytes
+
+	Parameters:
+	   keep ( str ): Entry that is never removed (the one just written)
+	"""
+	entries = []
+	for name in os.listdir(cache_dir):
+		path = os.path.join(cache_dir, name)
+		if (name.endswith(".npy") and path!=keep):
+			stat = os.stat(path)
+			entries.append((stat.st_mtime, stat.st_size, path))
+	total = sum(size for (mtime,size,path) in entries)
+	if keep is not None:
+		total += os.path.getsize(keep)
+	for (mtime,size,path) in sorted(entries):
+		if total<=cache_max_bytes:
+			break
+		try:
+			os.remove(path)
+		except OSError:
+			pass
+		total -= size
+
+def cached_parse(version):
+	"""
+	Decorator caching a parser's typed table on disk, keyed on input content and parser version
+
+	The parser takes the input file path-name as first argument and returns a
+	structured array or an array of dictionaries, which is stored as a
+	structured array. On a warm run the table is loaded and the text is not
+	parsed at all. Entries of older versions of the parser are removed when a
+	new entry is written, and the cache is kept under cache_max_bytes by
+	evicting the least recently used entries.
+
+	Parameters:
+	   version ( int ): Parser version, to be bumped whenever its output changes
+	"""
+	def decorator(parser):
+		# Named after the defining file, since scripts run as __main__
+		name = os.path.splitext(os.path.basename(parser.__code__.co_filename))[0] + "." + parser.__qualname__
+		@functools.wraps(parser)
+		def wrapper(infile, *args, **kwargs):
+			key = hashlib.sha256(repr((args, sorted(kwargs.items()))).encode()).hexdigest()[:8]
+			path = os.path.join(cache_dir, "%s-v%d-%s-%s.npy" % (name, version, file_hash(infile)[:32], key))
+			if os.path.exists(path):
+				os.utime(path)
+				return np.load(path)
+			table = to_table(parser(infile, *args, **kwargs))
+			os.makedirs(cache_dir, exist_ok=True)
+			for entry in os.listdir(cache_dir):
+				if (entry.startswith(name + "-v") and not entry.startswith("%s-v%d-" % (name, version))):
+					try:
+						os.remove(os.path.join(cache_dir, entry))
+					except OSError:
+						pass
+			(fd, tmpfile) = tempfile.mkstemp(suffix=".tmp", dir=cache_dir)
+			with os.fdopen(fd, 'wb') as file1:
+				np.save(file1, table)
+			os.replace(tmpfile, path)
+			evict(keep=path)
+			return table
+		wrapper.uncached = parser
+		return wrapper
+	return decorator
@@ -0,0 +1,233 @@
+"""This contains the dependency graph of the evaluation pipeline and an incremental builder"""
+
+import ast
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+
+from parsecache import cache_dir, file_hash
+
+class Stage:
+	"""
+	One pipeline stage: a command reading inputs and writing outputs
+
+	Parameters:
+	   name ( str ): Stage name
+	   command ( list ): Command line run from the working directory
+	   inputs ( list ): Files read by the stage, including its code
+	   outputs ( list ): Files written by the stage
+	"""
+	def __init__(self, name, command, inputs, outputs):
+		self.name = name
+		self.command = command
+		self.inputs = inputs
+		self.outputs = outputs
+
+def local_modules(module, found=None):
+	"""
+	Get the local module files a module imports, directly or through other local modules
+
+	Imports inside functions are included. Only modules with a .py file next
+	to this one count, so library imports are ignored.
+
+	Parameters:
+	   module ( str ): Module file
+	   found ( list ): Module files found so far
+	"""
+	found = [] if found is None else found
+	with open(os.path.join(code_dir, module)) as file1:
+		tree = ast.parse(file1.read(), module)
+	for node in ast.walk(tree):
+		if isinstance(node, ast.Import):
+			names = [alias.name for alias in node.names]
+		elif isinstance(node, ast.ImportFrom) and not node.level:
+			names = [node.module]
+		else:
+			continue
+		for name in names:
+			path = name.split(".")[0] + ".py"
+			if path not in found and path!=module and os.path.exists(os.path.join(code_dir, path)):
+				found.append(path)
+				local_modules(path, found)
+	return found
+
+def cli_stage(name, module, inputs, outputs):
+	"""
+	Make a stage running one pipeline subcommand of the command line interface
+
+	The command line interface, the module running the stage and every local
+	module it imports are inputs of the stage, so code changes rebuild it.
+
+	Parameters:
+	   name ( str ): Stage name, also the subcommand
+	   module ( str ): Module file running the stage
+	   inputs ( list ): Data files read by the stage
+	   outputs ( list ): Data files written by the stage
+	"""
+	modules = [path for path in local_modules(module) if path!="nubasecrp.py"]
+	return Stage(name, [sys.executable, "nubasecrp.py", name], ["nubasecrp.py", module] + sorted(modules) + inputs, outputs)
+
+code_dir = os.path.dirname(os.path.abspath(__file__))
+
+stages = [
+	cli_stage("frdmqrpa", "getFRDMQRPA.py",
+		["pn-frdm2012-sdn-gtff-beoh350.dat", "tlifminusff-beta-2018.dat"],
+		["datafrdmqrpa_pxn_t12.npy"]),
+	cli_stage("frdm", "getFRDM.py",
+		["ADNDT-FRDM2012-TABLE.dat"],
+		["data_bound.npy", "data_bound_Qbn.npy"]),
+	cli_stage("ws36", "getWS36.py",
+		["WS3.6.txt"],
+		["data_bound_WS36.npy", "data_bound_Qbn_WS36.npy"]),
+	cli_stage("nubase", "getnubase.py",
+		["nubase_3.mas20.txt", "211114_listofeval_exp.txt", "datafrdmqrpa_pxn_t12.npy"],
+		["nubase_states.npy", "nubase_stable.npy", "nubase_bminus.npy", "nubase_bplus.npy", "nubase_alpha.npy", "iaea_crp_bdn.npy", "iaea_crp_bdn_states.npy",
+		"nubase_bminus_addFRDMQRPAPxn.npy", "datafrdmqrpa_pxn_t12_add_to_iaeacrp_bdn_sep.npy",
+		"nubase_bminus_add_to_iaeacrp_bdn.npy", "nubase_stable_add_to_iaea_crp.npy"]),
+	cli_stage("combine", "combinedata.py",
+		["220327_listofeval_exp.txt", "nubase_states.npy", "nubase_stable.npy", "nubase_bminus.npy"],
+		["iaea_crp_bdn_220327.npy", "iaea_crp_bdn_220327_states.npy", "nubase_bminus_add_to_iaeacrp_bdn_220327.npy",
+		"nubase_stable_add_to_iaeacrp_bdn_220327.npy", "iaea_crp_nubase_combined_220327.npy"]),
+	cli_stage("coverage", "coveragegaps.py",
+		["data_bound_Qbn.npy", "iaea_crp_bdn_220327.npy", "nubase_bminus.npy", "datafrdmqrpa_pxn_t12.npy"],
+		["coverage_FRDM2012_220327.csv", "coverage_FRDM2012_220327.json"]),
+]
+
+state_file = os.path.join(cache_dir, "pipeline.json")
+
+def load_state():
+	"""
+	Load the input hashes recorded at the last successful run of every stage
+	"""
+	try:
+		with open(state_file) as file1:
+			return json.load(file1)
+	except (OSError, ValueError):
+		return {}
+
+def save_state(state):
+	"""
+	Save the recorded input hashes of every stage
+
+	Parameters:
+	   state ( dict ): Input hashes keyed by stage name
+	"""
+	os.makedirs(cache_dir, exist_ok=True)
+	with open(state_file + ".tmp", 'w') as file1:
+		json.dump(state, file1, indent=1, sort_keys=True)
+	os.replace(state_file + ".tmp", state_file)
+
+def upstream(stage, stages=stages):
+	"""
+	Get the stages writing the inputs of a stage
+
+	Parameters:
+	   stage ( Stage ): Pipeline stage
+	   stages ( list ): All pipeline stages
+	"""
+	return [other for other in stages if set(other.outputs) & set(stage.inputs)]
+
+def required(targets, stages=stages):
+	"""
+	Get the stages needed to build the target stages, in pipeline order
+
+	Parameters:
+	   targets ( list ): Target stage names, all stages when empty
+	   stages ( list ): All pipeline stages
+	"""
+	if not targets:
+		return list(stages)
+	byname = {stage.name: stage for stage in stages}
+	todo = [byname[name] for name in targets]
+	needed = set()
+	while todo:
+		stage = todo.pop()
+		if stage.name not in needed:
+			needed.add(stage.name)
+			todo.extend(upstream(stage, stages))
+	return [stage for stage in stages if stage.name in needed]
+
+def input_hashes(stage):
+	"""
+	Get the content hash of every input of a stage
+
+	Parameters:
+	   stage ( Stage ): Pipeline stage
+	"""
+	return {infile: file_hash(infile) for infile in stage.inputs}
+
+def run_stage(stage):
+	"""
+	Run a stage command, returning its exit code
+
+	Parameters:
+	   stage ( Stage ): Pipeline stage
+	"""
+	env = dict(os.environ, MPLBACKEND="Agg")
+	return subprocess.run(stage.command, env=env).returncode
+
+def build(targets=None, jobs=None, force=False, stages=stages):
+	"""
+	Rebuild the stages whose inputs changed, running independent stages concurrently
+
+	A stage runs once all stages writing its inputs have finished. It is
+	skipped when the content of every input matches the last successful run
+	and all outputs exist. Returns the names of the stages that failed.
+
+	Parameters:
+	   targets ( list ): Target stage names, all stages when empty
+	   jobs ( int ): Maximum number of stages running at the same time
+	   force ( bool ): Rebuild every required stage
+	   stages ( list ): All pipeline stages
+	"""
+	state = load_state()
+	selected = required(targets, stages)
+	pending = list(selected)
+	finished = set()
+	failed = []
+	running = {}
+	with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or len(pending) or 1) as pool:
+		while pending or running:
+			for stage in list(pending):
+				deps = [dep.name for dep in upstream(stage, selected) if dep is not stage]
+				if any(dep in failed for dep in deps):
+					pending.remove(stage)
+					failed.append(stage.name)
+					print("Skipping", stage.name, "(upstream failed)")
+				elif all(dep in finished for dep in deps):
+					pending.remove(stage)
+					hashes = input_hashes(stage)
+					if (not force and state.get(stage.name)==hashes and all(os.path.exists(f) for f in stage.outputs)):
+						print("Up to date:", stage.name)
+						finished.add(stage.name)
+					else:
+						print("Building:", stage.name)
+						running[pool.submit(run_stage, stage)] = (stage, hashes)
+			if not running:
+				if pending:
+					# Only reachable with a dependency cycle
+					failed.extend(stage.name for stage in pending)
+					break
+				continue
+			done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+			for future in done:
+				(stage, hashes) = running.pop(future)
+				if future.result()==0:
+					finished.add(stage.name)
+					state[stage.name] = hashes
+					save_state(state)
+				else:
+					failed.append(stage.name)
+					print("Failed:", stage.name)
+	return failed
+
+if __name__ == "__main__":
+	import argparse
+	parser = argparse.ArgumentParser(description="Incrementally rebuild the evaluation pipeline")
+	parser.add_argument("targets", nargs="*", help="stages to build: " + ", ".join(stage.name for stage in stages))
+	parser.add_argument("-j", "--jobs", type=int, default=None, help="maximum number of concurrent stages")
+	parser.add_argument("-f", "--force", action="store_true", help="rebuild every required stage")
+	args = parser.parse_args()
+	sys.exit(1 if build(args.targets, args.jobs, args.force) else 0)
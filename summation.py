@@ -0,0 +1,295 @@
+"""This contains a sparse-matrix beta-decay and beta-delayed neutron summation engine"""
+
+import os
+
+import numpy as np
+
+from nuclideindex import GridIndex
+from nuclideset import NuclideSet
+from nuctable import from_columns, load_table, save_table
+
+# Decay constants within this relative difference are treated as equal, see DecayNetwork.groups
+rate_tolerance = 1e-9
+
+def branching_ratios(data, percent=True):
+	"""
+	Get the "Pjn" (j>=1) fields of a table, their neutron multiplicities j and the (row, field) branching ratios as fractions
+
+	Negative branching ratios count as 0, and ratios summing above 1 are normalized.
+
+	Parameters:
+	   data ( list ): Structured array with "P1n", "P2n", ... columns
+	   percent ( bool ): Branching ratios are in % (IAEA CRP, NUBASE) rather than fractions (FRDM+QRPA)
+	"""
+	Pxn = sorted((int(key[1:-1]), key) for key in data.dtype.names if key[0]=="P" and key[-1]=="n" and key[1:-1].isdigit() and key!="P0n")
+	branches = np.stack([np.clip(np.asarray(data[key], dtype=float), 0, None) for (j, key) in Pxn], axis=1) if Pxn else np.zeros((len(data), 0))
+	if percent:
+		branches = branches/100.
+	total = branches.sum(axis=1)
+	branches[total>1] /= total[total>1, None]
+	return [key for (j, key) in Pxn], np.array([j for (j, key) in Pxn], dtype=float), branches
+
+class DecayNetwork:
+	"""
+	Beta-decay network of a nuclide table as a sparse transition matrix
+
+	Every nuclide with T12>0 decays with lambda = ln2/T12 to (Z+1, N-1-j)
+	with the branching ratio Pjn (j>=1), see branching_ratios, and to
+	(Z+1, N-1) with the rest. Nuclides without T12>0 (e.g. -9999) and daughters missing
+	from the table are stable. Populations are vectors over the nuclides of
+	the network, whose (Z, N) are in the "Z" and "N" columns of self.nodes.
+
+	Parameters:
+	   data ( list ): Structured array with "Z", "N", "T12" (s) and "P1n", "P2n", ... columns
+	   percent ( bool ): Branching ratios are in % (IAEA CRP, NUBASE) rather than fractions (FRDM+QRPA)
+	"""
+	def __init__(self, data, percent=True):
+		import scipy.sparse
+		Z = np.asarray(data["Z"], dtype=int)
+		N = np.asarray(data["N"], dtype=int)
+		T12 = np.asarray(data["T12"], dtype=float)
+		(self.branch_fields, multiplicity, branches) = branching_ratios(data, percent)
+		Pxn = list(zip(multiplicity.astype(int), self.branch_fields))
+		self.multiplicity = multiplicity
+		# Parents first, then their daughters not in the table
+		parent_Z = np.repeat(Z, len(Pxn)+1)
+		parent_N = np.repeat(N, len(Pxn)+1)
+		emitted = np.tile(np.concatenate([[0], multiplicity]).astype(int), len(Z))
+		(node_Z, node_N) = (np.concatenate([Z, parent_Z+1]), np.concatenate([N, parent_N-1-emitted]))
+		keep = node_N>=0
+		nodes = from_columns({"Z": node_Z[keep], "N": node_N[keep]})
+		# Sorted by Z then N: every decay goes to a later row, so the network is acyclic
+		self.nodes = nodes[np.unique(nodes["Z"].astype(np.int64)*1000+nodes["N"], return_index=True)[1]]
+		self.index = GridIndex(self.nodes)
+		self.size = len(self.nodes)
+		parent = self.index.rows(Z, N)
+		decays = T12>0
+		# Network row of every table row and of its daughters, column 0 without neutron emission
+		self.parents = parent
+		self.decay_constant = np.zeros(self.size)
+		self.decay_constant[parent[decays]] = np.log(2)/T12[decays]
+		# Mean number of neutrons emitted per decay
+		self.neutrons = np.zeros(self.size)
+		self.neutrons[parent] = branches @ multiplicity if Pxn else 0.
+		probability = np.concatenate([(1-branches.sum(axis=1))[:, None], branches], axis=1)
+		daughter = self.index.rows(parent_Z+1, parent_N-1-emitted).reshape(len(Z), len(Pxn)+1)
+		self.daughters = daughter
+		valid = (daughter>=0) & (probability>0) & decays[:, None]
+		# rates[i, j]: decays per second of j feeding i
+		self.rates = scipy.sparse.csr_matrix(((self.decay_constant[parent][:, None]*probability)[valid],
+			(daughter[valid], np.broadcast_to(parent[:, None], daughter.shape)[valid])), shape=(self.size, self.size))
+		# dN/dt = matrix @ N
+		self.matrix = (self.rates - scipy.sparse.diags(self.decay_constant)).tocsr()
+		self._groups = None
+
+	def groups(self):
+		"""
+		Get the distinct decay constants of the network, merging those within a relative rate_tolerance, and the group of every nuclide
+		"""
+		if self._groups is None:
+			order = np.argsort(self.decay_constant, kind="stable")
+			rate = self.decay_constant[order]
+			distinct = np.concatenate([[True], rate[1:]>rate[:-1]*(1+rate_tolerance)])
+			group = np.empty(self.size, dtype=int)
+			group[order] = np.cumsum(distinct)-1
+			self._groups = (rate[distinct], group)
+		return self._groups
+
+	def expansion(self, population):
+		"""
+		Expand the populations over time on the functions t^m/m! exp(-l t) of the distinct decay constants l, see groups
+
+		Returns the decay constants l and, for every power m, the sparse
+		(nuclide, constant) coefficients and an upper bound of the magnitude
+		of the terms summed into them. Decays always go from Z to Z+1, so the
+		coefficients of a Z layer follow from those of the previous layer:
+		an inflow t^m/m! exp(-l t) into a nuclide of decay constant k gives
+		t^(m+1)/(m+1)! exp(-k t) when l=k, which keeps chains of equal
+		half-lives exact, and sum_p (-1)^(m-p) t^p/p! exp(-l t)/(k-l)^(m-p+1)
+		plus the exp(-k t) term matching the population at time 0 otherwise.
+
+		Parameters:
+		   population ( array ): Populations at time 0
+		"""
+		import scipy.sparse
+		(rate, group) = self.groups()
+		own = rate[group]
+		size = len(rate)
+		Z = self.nodes["Z"]
+		starts = np.flatnonzero(np.concatenate([[True], Z[1:]!=Z[:-1]]))
+		ends = np.concatenate([starts[1:], [self.size]])
+		(layers, previous) = ([], None)
+		for (s, e) in zip(starts, ends):
+			# (row, constant, coefficient, magnitude) terms of every power
+			terms = {0: [(np.arange(e-s), group[s:e], population[s:e], np.abs(population[s:e]))]}
+			if previous is not None and Z[s]==Z[previous[0]]+1:
+				for (m, block) in enumerate(previous[2]):
+					inflow = (self.rates[s:e, previous[0]:previous[1]] @ block).tocoo()
+					# Pair the coefficient and the magnitude of every (row, constant)
+					(keys, position) = np.unique(inflow.row.astype(np.int64)*size + inflow.col%size, return_inverse=True)
+					(coefficient, magnitude) = (np.zeros(len(keys)), np.zeros(len(keys)))
+					first = inflow.col<size
+					coefficient[position[first]] = inflow.data[first]
+					magnitude[position[~first]] = inflow.data[~first]
+					(row, col) = np.divmod(keys, size)
+					same = group[s+row]==col
+					if same.any():
+						terms.setdefault(m+1, []).append((row[same], col[same], coefficient[same], magnitude[same]))
+					(row, col, coefficient, magnitude) = (row[~same], col[~same], coefficient[~same], magnitude[~same])
+					difference = own[s+row] - rate[col]
+					for p in range(m+1):
+						factor = (-1.)**(m-p)/difference**(m-p+1)
+						terms.setdefault(p, []).append((row, col, coefficient*factor, magnitude*np.abs(factor)))
+					factor = (-1.)**m/difference**(m+1)
+					terms[0].append((row, group[s+row], -coefficient*factor, magnitude*np.abs(factor)))
+			blocks = []
+			for m in range(max(terms)+1):
+				(row, col, coefficient, magnitude) = [np.concatenate(values) for values in zip(*terms.get(m, [(np.zeros(0, dtype=int),)*2+(np.zeros(0),)*2]))]
+				# Coefficients in the first columns, magnitudes in the next ones, so that one product carries both
+				block = scipy.sparse.csr_matrix((np.concatenate([coefficient, magnitude]), (np.concatenate([row, row]), np.concatenate([col, col+size]))), shape=(e-s, 2*size))
+				block.eliminate_zeros()
+				blocks.append(block)
+			layers.append(blocks)
+			previous = (s, e, blocks)
+		powers = max(len(blocks) for blocks in layers)
+		stacked = [scipy.sparse.vstack([blocks[m] if m<len(blocks) else scipy.sparse.csr_matrix(blocks[0].shape) for blocks in layers]).tocsr() for m in range(powers)]
+		return rate, [block[:, :size] for block in stacked], [block[:, size:] for block in stacked]
+
+	def population(self, Z, N, values):
+		"""
+		Build a population vector, e.g. from cumulative fission yields, ignoring nuclides outside the network
+
+		Parameters:
+		   Z ( array ): Proton numbers
+		   N ( array ): Neutron numbers
+		   values ( array ): Population of every nuclide
+		"""
+		rows = self.index.rows(Z, N)
+		population = np.zeros(self.size)
+		np.add.at(population, rows[rows>=0], np.asarray(values, dtype=float)[rows>=0])
+		return population
+
+	def evolve(self, population, times, method="bateman", rtol=1e-8, atol=1e-30):
+		"""
+		Solve the Bateman equations, returning the populations at every time as a (time, nuclide) array
+
+		method "bateman" sums the layer-by-layer expansion of DecayNetwork.expansion,
+		exact for chains of equal half-lives, and falls back to "ode" when the
+		estimated rounding error of its sums, from nearly equal but distinct
+		half-lives, exceeds rtol times the populations or times the total
+		population at time 0; "ode" integrates the stiff linear system with an
+		implicit solver using the sparse Jacobian, much slower.
+
+		Parameters:
+		   population ( array ): Populations at time 0
+		   times ( array ): Times (s)
+		   method ( str ): "bateman" or "ode"
+		   rtol ( float ): Relative tolerance
+		   atol ( float ): Absolute tolerance of the "ode" method
+		"""
+		times = np.asarray(times, dtype=float)
+		population = np.asarray(population, dtype=float)
+		if method=="bateman":
+			from scipy.special import factorial
+			(rate, coefficients, magnitudes) = self.expansion(population)
+			(populations, bound) = (np.zeros((self.size, len(times))), np.zeros((self.size, len(times))))
+			for (m, (coefficient, magnitude)) in enumerate(zip(coefficients, magnitudes)):
+				basis = times**m/factorial(m)*np.exp(-np.outer(rate, times))
+				populations += coefficient @ basis
+				bound += magnitude @ basis
+			if np.all(np.finfo(float).eps*bound<=rtol*(np.abs(populations) + np.abs(population).sum())):
+				return populations.T
+			method = "ode"
+		if method!="ode":
+			raise ValueError("Unknown method %s" % method)
+		from scipy.integrate import solve_ivp
+		solution = solve_ivp(lambda t, y: self.matrix @ y, (0., max(times.max(), 0.)), population,
+			method="BDF", t_eval=np.sort(times), jac=self.matrix, rtol=rtol, atol=atol)
+		if not solution.success:
+			raise RuntimeError("Bateman solution failed: " + solution.message)
+		return solution.y.T[np.argsort(np.argsort(times))]
+
+	def neutron_activity(self, populations):
+		"""
+		Get the delayed-neutron emission rate (neutrons/s) over time and the contribution of every precursor
+
+		Returns the total rate (time,) and the per-nuclide contributions (time, nuclide).
+
+		Parameters:
+		   populations ( array ): Populations returned by evolve
+		"""
+		contributions = populations*(self.decay_constant*self.neutrons)
+		return contributions.sum(axis=1), contributions
+
+def summation(data, Z, N, values, times, percent=True, method="bateman"):
+	"""
+	Delayed-neutron summation from an initial population, e.g. cumulative fission yields
+
+	Returns a dictionary with the network "nodes", the "times", the
+	"populations", the delayed-neutron "activity" and the per-precursor
+	"contributions".
+
+	Parameters:
+	   data ( list ): Structured array with "Z", "N", "T12" (s) and "P1n", "P2n", ... columns
+	   Z ( array ): Proton numbers of the initial population
+	   N ( array ): Neutron numbers of the initial population
+	   values ( array ): Initial population of every nuclide
+	   times ( array ): Times (s)
+	   percent ( bool ): Branching ratios are in %
+	   method ( str ): "bateman" or "ode", see DecayNetwork.evolve
+	"""
+	network = DecayNetwork(data, percent)
+	populations = network.evolve(network.population(Z, N, values), times, method)
+	(activity, contributions) = network.neutron_activity(populations)
+	return {"nodes": network.nodes, "times": np.asarray(times, dtype=float), "populations": populations, "activity": activity, "contributions": contributions}
+
+def load_yields(infile):
+	"""
+	Load an initial population file with "Z A yield" columns, returning the Z, N and yield arrays
+
+	Parameters:
+	   infile ( str ): File path-name
+	"""
+	values = np.loadtxt(infile, comments="#", ndmin=2)
+	Z = values[:, 0].astype(int)
+	return Z, values[:, 1].astype(int)-Z, values[:, 2]
+
+def report_isomers(data, states):
+	"""
+	Print how many isomeric precursors of a states table are left out of a ground-state decay table, when the states table exists
+
+	Parameters:
+	   data ( str ): Decay data table, holding ground states only
+	   states ( str ): States table with an "liso" isomer index column, see iaeacrp.save_crp_states
+	"""
+	if states is not None and os.path.exists(states):
+		isomers = np.count_nonzero(load_table(states)["liso"]!=0)
+		print("%d isomeric precursors of %s are not in %s: only ground states are evolved" % (isomers, states, data))
+
+def run(infile, data="iaea_crp_nubase_combined_220327.npy", times=None, outstem="summation", states="iaea_crp_bdn_220327_states.npy"):
+	"""
+	Run a delayed-neutron summation from an initial population file
+
+	Writes the delayed-neutron activity to <outstem>.csv and the nuclides
+	with their "populations" and "contributions" over time to <outstem>.npy.
+
+	Parameters:
+	   infile ( str ): Initial population file with "Z A yield" columns, see load_yields
+	   data ( str ): Decay data table, with branching ratios in %
+	   times ( array ): Times (s), 0 and 50 log-spaced times from 0.01 to 1000 s when None
+	   outstem ( str ): Output file path-name without extension
+	   states ( str ): States table of the isomers left out of data, see report_isomers
+	"""
+	report_isomers(data, states)
+	times = np.concatenate([[0.], np.logspace(-2, 3, 50)]) if times is None else np.asarray(times, dtype=float)
+	(Z, N, values) = load_yields(infile)
+	result = summation(load_table(data), Z, N, values, times)
+	outside = np.count_nonzero(~NuclideSet.from_table(result["nodes"]).contains(Z, N))
+	if outside:
+		print("%d nuclides of %s are not in %s" % (outside, infile, data))
+	np.savetxt(outstem + ".csv", np.stack([result["times"], result["activity"]], axis=1), delimiter=",", header="time_s,neutrons_per_s", comments="")
+	table = np.zeros(len(result["nodes"]), dtype=[("Z","i4"),("N","i4"),("populations","f8",(len(times),)),("contributions","f8",(len(times),))])
+	(table["Z"], table["N"]) = (result["nodes"]["Z"], result["nodes"]["N"])
+	(table["populations"], table["contributions"]) = (result["populations"].T, result["contributions"].T)
+	save_table(outstem + ".npy", table)
+	return result
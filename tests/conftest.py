@@ -0,0 +1,17 @@
+"""This contains the shared setup of the tests: the repository modules are importable and the data tables are read from the repository"""
+
+import os
+import sys
+
+import pytest
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+
+@pytest.fixture
+def repo_dir(monkeypatch):
+	"""
+	Run a test from the repository directory, where the data tables are
+	"""
+	monkeypatch.chdir(root)
+	return root
@@ -0,0 +1,22 @@
+"""This contains the tests of the decay path tracer"""
+
+import numpy as np
+
+from decaypaths import DecayPaths, load_emitters
+from nuctable import load_table
+
+def test_matrix_rows_sum_to_one(repo_dir):
+	paths = DecayPaths(load_emitters(), load_table("nubase_stable.npy"))
+	np.testing.assert_allclose(np.asarray(paths.matrix().sum(axis=1)).ravel(), 1., rtol=1e-12)
+
+def test_set_branching_matches_rebuild(repo_dir):
+	(data, stable) = (load_emitters(), load_table("nubase_stable.npy"))
+	paths = DecayPaths(data, stable)
+	# 98Rb
+	assert paths.set_branching(37, 61, {"P1n": 40., "P2n": 2.})>1
+	row = np.flatnonzero((data["Z"]==37) & (data["N"]==61))
+	(data["P1n"][row], data["P2n"][row]) = (40., 2.)
+	fresh = DecayPaths(data, stable)
+	assert np.array_equal(paths.nodes, fresh.nodes)
+	assert abs(paths.matrix() - fresh.matrix()).max()<1e-12
+	np.testing.assert_allclose(np.asarray(paths.matrix().sum(axis=1)).ravel(), 1., rtol=1e-12)
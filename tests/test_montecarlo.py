@@ -0,0 +1,55 @@
+"""This contains the tests of the Monte Carlo propagation of the T1/2 and Pxn uncertainties"""
+
+import numpy as np
+import pytest
+from scipy.stats import norm
+
+from montecarlo import activity, branching, correlation_matrix, draw
+from nuctable import from_columns, load_table
+from summation import DecayNetwork
+
+def single_nuclide(size):
+	"""
+	Get a one-row table with asymmetric T12 and P1n uncertainties, replicated size times
+
+	Parameters:
+	   size ( int ): Number of rows
+	"""
+	return from_columns({"Z": np.full(size, 37), "N": np.full(size, 61),
+		"T12": np.full(size, 10.), "dT12": np.full(size, 1.), "dT12hi": np.full(size, 3.),
+		"P1n": np.full(size, 20.), "dP1n": np.full(size, 2.), "dP1nhi": np.full(size, 4.),
+		"P2n": np.full(size, 1.), "dP2n": np.full(size, 0.1), "dP2nhi": np.full(size, 0.1)})
+
+@pytest.mark.parametrize("method", ["split", "lognormal"])
+def test_draw_median_and_widths(method):
+	samples = draw(single_nuclide(1), 200000, np.random.default_rng(2), method)
+	# Both distributions have the value as median and value-dX, value+dXhi as 16 and 84 % quantiles
+	(low, high) = norm.cdf([-1., 1.])
+	for (field, value, lower, upper) in (("T12", 10., 1., 3.), ("P1n", 20., 2., 4.)):
+		quantiles = np.quantile(samples[field][0], [low, 0.5, high])
+		np.testing.assert_allclose(quantiles, [value-lower, value, value+upper], atol=0.02*lower)
+
+def test_draw_correlation():
+	samples = draw(single_nuclide(1), 100000, np.random.default_rng(3), "split", correlation_matrix(T12_P1n=0.8))
+	# The split-normal values map back to their standard normal deviates
+	deviates = [np.where(x<value, (x-value)/lower, (x-value)/upper) for (x, value, lower, upper)
+		in ((samples["T12"][0], 10., 1., 3.), (samples["P1n"][0], 20., 2., 4.), (samples["P2n"][0], 1., 0.1, 0.1))]
+	np.testing.assert_allclose(np.corrcoef(deviates), correlation_matrix(T12_P1n=0.8), atol=0.01)
+
+def test_activity_matches_ode(repo_dir):
+	data = load_table("iaea_crp_nubase_combined_220327.npy")
+	chosen = np.flatnonzero((data["A"]>=90) & (data["A"]<=100) & (data["T12"]>0))
+	(Z, N) = (data["Z"][chosen], data["N"][chosen])
+	values = np.random.default_rng(4).uniform(0., 1., len(chosen))
+	times = np.array([0., 0.1, 1., 10., 100.])
+	network = DecayNetwork(data)
+	population = network.population(Z, N, values)
+	samples = draw(data, 4, np.random.default_rng(5))
+	result = activity(network, data, samples, branching(network, data, samples), population, times)
+	for r in range(result.shape[0]):
+		realization = data.copy()
+		for (key, value) in samples.items():
+			realization[key] = value[:, r]
+		decays = DecayNetwork(realization)
+		reference = decays.neutron_activity(decays.evolve(decays.population(Z, N, values), times, "ode"))[0]
+		np.testing.assert_allclose(result[r], reference, rtol=1e-6)
@@ -0,0 +1,49 @@
+"""This contains the tests of the decay network and the delayed-neutron summation"""
+
+import numpy as np
+import pytest
+import scipy.integrate
+from scipy.special import factorial
+
+from nuctable import from_columns, load_table
+from summation import DecayNetwork, summation
+
+def chain_populations(length, T12, times, method):
+	"""
+	Evolve a chain of equal half-lives from one atom of its first nuclide, returning the populations and the analytic solution (lt)^k/k! exp(-lt)
+
+	Parameters:
+	   length ( int ): Number of nuclides of the chain
+	   T12 ( float ): Half-life (s) of every nuclide
+	   times ( array ): Times (s)
+	   method ( str ): "bateman" or "ode", see DecayNetwork.evolve
+	"""
+	Z = np.arange(length)+1
+	network = DecayNetwork(from_columns({"Z": Z, "N": 2*length-Z, "T12": np.full(length, float(T12))}))
+	populations = network.evolve(network.population(Z[:1], [2*length-1], [1.]), times, method)
+	x = np.log(2)/T12*times
+	exact = np.stack([x**k/factorial(k)*np.exp(-x) for k in range(length)], axis=1)
+	return populations[:, network.index.rows(Z, 2*length-Z)], exact
+
+@pytest.mark.parametrize("method,tolerance", [("bateman", 1e-14), ("ode", 1e-7)])
+def test_equal_half_life_chain(method, tolerance):
+	times = np.array([0., 0.5, 1., 5., 20.])
+	(populations, exact) = chain_populations(4, 1., times, method)
+	assert np.abs(populations - exact).max() < tolerance
+
+def no_ode(*args, **kwargs):
+	raise AssertionError("the bateman method fell back to ode")
+
+def test_bateman_matches_ode_on_combined_table(repo_dir, monkeypatch):
+	data = load_table("iaea_crp_nubase_combined_220327.npy")
+	rng = np.random.default_rng(1)
+	chosen = (data["A"]>=80) & (data["A"]<=150) & (data["T12"]>0)
+	(Z, N) = (data["Z"][chosen], data["N"][chosen])
+	values = rng.uniform(0., 1., len(Z))
+	times = np.concatenate([[0.], np.logspace(-2, 3, 20)])
+	with monkeypatch.context() as patch:
+		patch.setattr(scipy.integrate, "solve_ivp", no_ode)
+		bateman = summation(data, Z, N, values, times, method="bateman")
+	ode = summation(data, Z, N, values, times, method="ode")
+	assert np.abs(bateman["populations"] - ode["populations"]).max() < 1e-6*values.sum()
+	np.testing.assert_allclose(bateman["activity"], ode["activity"], rtol=1e-6, atol=1e-12*bateman["activity"].max())
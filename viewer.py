@@ -0,0 +1,123 @@
+"""This contains an interactive chart of nuclides showing the data of the nuclide under the cursor"""
+
+import numpy as np
+
+from chart import draw_layer, plot_magic_lines, set_chart_axes
+from chartexport import layer_mask
+from nuclideindex import GridIndex
+from nuctable import load_table
+
+class ChartViewer:
+	"""
+	Interactive chart drawn from a chart spec, with hover and click lookup
+
+	Every layer gets a GridIndex, so resolving the nuclide under the cursor is
+	one array read per layer. Hovering a cell shows the fields of every layer
+	containing it, topmost layer first, with its source; clicking also prints
+	them. The figure is only redrawn when the cursor enters another cell.
+
+	Parameters:
+	   spec ( dict ): Chart spec, see chartexport.render
+	   ax ( Axes ): Axes to draw on, the current axes when None
+	"""
+	def __init__(self, spec, ax=None):
+		import matplotlib.pyplot as plt
+		self.ax = plt.gca() if ax is None else ax
+		self.layers = []
+		tables = {}
+		plot_magic_lines()
+		for layer in spec["layers"]:
+			if layer["table"] not in tables:
+				tables[layer["table"]] = load_table(layer["table"])
+			table = tables[layer["table"]]
+			data = table[layer_mask(table, layer)]
+			draw_layer(data["N"],data["Z"],fcolor=layer.get("fcolor",'None'),ecolor=layer.get("ecolor",'gray'),falpha=layer.get("falpha",1),linewidth=layer.get("linewidth"),ax=self.ax)
+			self.layers.append((layer.get("label", layer["table"]), data, GridIndex(data)))
+		set_chart_axes(xlim=spec.get("xlim",[9.5,200]), ylim=spec.get("ylim",[9.5,116]))
+		if "title" in spec:
+			self.ax.set_title(spec["title"])
+		self.annotation = self.ax.annotate("", xy=(0,0), xytext=(12,12), textcoords="offset points", fontsize="x-small",
+			family="monospace", bbox=dict(boxstyle="round", fc="w", alpha=0.9), zorder=10)
+		self.annotation.set_visible(False)
+		self.cell = None
+		self.background = None
+		canvas = self.ax.figure.canvas
+		if canvas.supports_blit:
+			# The tooltip is blitted over a saved copy of the chart instead of redrawing every layer
+			self.annotation.set_animated(True)
+			canvas.mpl_connect("draw_event", self.save_background)
+		canvas.mpl_connect("motion_notify_event", self.hover)
+		canvas.mpl_connect("button_press_event", self.click)
+
+	def lookup(self, Z, N):
+		"""
+		Get the entries of nuclide (Z, N) in every layer, topmost layer first, as (layer name, entry) pairs
+
+		Parameters:
+		   Z ( int ): Proton number
+		   N ( int ): Neutron number
+		"""
+		found = []
+		for (name, data, index) in reversed(self.layers):
+			i = index.row(Z, N)
+			if i is not None:
+				found.append((name, data[i]))
+		return found
+
+	def describe(self, Z, N):
+		"""
+		Get the text describing nuclide (Z, N), or None if no layer contains it
+
+		Parameters:
+		   Z ( int ): Proton number
+		   N ( int ): Neutron number
+		"""
+		found = self.lookup(Z, N)
+		if not found:
+			return None
+		lines = ["Z=%d N=%d" % (Z, N)]
+		for (name, entry) in found:
+			source = entry["source"] if "source" in entry.dtype.names else name
+			lines.append("[%s]" % source)
+			for key in entry.dtype.names:
+				if key not in ("Z", "N", "source"):
+					value = entry[key]
+					lines.append("  %-6s %s" % (key, "%.6g" % value if isinstance(value, np.floating) else value))
+		return "\n".join(lines)
+
+	def save_background(self, event):
+		canvas = self.ax.figure.canvas
+		self.background = canvas.copy_from_bbox(self.ax.figure.bbox)
+		self.ax.draw_artist(self.annotation)
+
+	def cell_at(self, event):
+		if (event.inaxes is not self.ax or event.xdata is None):
+			return None
+		return (int(round(event.ydata)), int(round(event.xdata)))
+
+	def hover(self, event):
+		cell = self.cell_at(event)
+		if cell==self.cell:
+			return
+		self.cell = cell
+		text = None if cell is None else self.describe(*cell)
+		if text is None:
+			self.annotation.set_visible(False)
+		else:
+			self.annotation.xy = (cell[1], cell[0])
+			self.annotation.set_text(text)
+			self.annotation.set_visible(True)
+		canvas = self.ax.figure.canvas
+		if self.background is None:
+			canvas.draw_idle()
+		else:
+			canvas.restore_region(self.background)
+			self.ax.draw_artist(self.annotation)
+			canvas.blit(self.ax.figure.bbox)
+
+	def click(self, event):
+		cell = self.cell_at(event)
+		if cell is not None:
+			text = self.describe(*cell)
+			if text is not None:
+				print(text)